@@ -0,0 +1,241 @@
+import json
+import os
+import sys
+import time
+import networkx as nx
+import numpy as np
+from msbp.core import networkx_rounds
+from msbp.er_graph import erdos_renyi_csr, erdos_renyi_dense
+from msbp.graph_models import sample_model_graph
+from msbp.sparse_engine import graph_to_csr, initial_states, sparse_rounds
+from msbp.dense_engine import dense_rounds, run_dense_batch, run_dense_variants
+from msbp.frontier_engine import frontier_rounds
+from msbp.partitioned_engine import partitioned_rounds
+from msbp.deferred_engine import deferred_rounds
+from msbp.batched_engine import run_batch, run_variants
+from msbp.trajectory import new_trajectory, trajectory_steps, run_outcome
+
+# Parameters
+mode = 'all'  # 'equivalence' (fixed-seed checks against the reference spread_activation), 'benchmark' (timings vs. the baseline) or 'all'
+k2 = 20
+sigma = 3
+initial_activated_count = 10
+engines = ['networkx', 'sparse', 'dense', 'frontier', 'partitioned', 'deferred']  # Engines timed by the benchmark
+partition_threads = 4  # Threads of the row-partitioned sparse engine in the checks and timings
+# Equivalence grid: small enough for the reference dict-based loop
+equivalence_n_values = [50, 200, 500]
+equivalence_p_values = [0, 0.01, 0.03, 0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 1.0]
+equivalence_k1_values = [None] + list(range(3, 20))
+equivalence_seeds = [0, 1, 2]
+deferred_runs = 200  # Runs per cell for the statistical check of the graph-free deferred engine
+# Benchmark matrix
+benchmark_n_values = [500, 2000, 5000, 10000]
+benchmark_p_values = [0, 0.01, 0.05, 0.2, 0.5, 1.0]
+benchmark_k1_values = [None, 3, 13, 19]
+repeats = 3  # Graphs per (n, p); the median time is recorded
+networkx_max_edges = 2 * 10 ** 6  # Larger graphs are not built (or timed) with networkx
+baseline_path = 'benchmark_baseline.json'  # Reference timings; written on the first run (or when update_baseline is set)
+results_path = 'benchmark_results.json'  # Timings of the latest run
+update_baseline = False
+regression_tolerance = 0.25  # Flag cases more than 25% slower than the baseline ...
+regression_min_seconds = 0.02  # ... and slower by at least this much (shorter cases are mostly noise)
+
+
+# Function to build the reference networkx graph of a CSR adjacency (nodes 0..n-1)
+def reference_graph(A):
+    G = nx.Graph()
+    G.add_nodes_from(range(A.shape[0]))
+    rows, cols = A.nonzero()
+    G.add_edges_from(zip(rows.tolist(), cols.tolist()))
+    return G
+
+
+# Generator yielding the per-step counts of the reference implementation, core.networkx_rounds: msbp.sweep semantics
+# (reweaken=True) or msbp.nscaling semantics (reweaken=False, weak nodes are not re-weakened)
+def reference_rounds(G, initial_activated, k1, reweaken=True, trajectory=None):
+    initial_activated = set(initial_activated.tolist())
+    node_states = {node: sigma if node in initial_activated else 0 for node in G.nodes}
+    return networkx_rounds(G, node_states, k1, k2, sigma, reweaken, trajectory)
+
+
+# Function to collect the steps of a run up to and including the first step without any change
+def run_steps(rounds, initial_count, limit=10000):
+    steps = []
+    previous = (initial_count, 0)
+    for _ in range(limit):
+        step = tuple(int(value) for value in next(rounds))
+        steps.append(step)
+        if step[3:] == previous:
+            break
+        previous = step[3:]
+    return steps
+
+
+# Function to compare two outcome tuples (floats to 12 significant digits)
+def same_outcome(a, b):
+    return all(float(f'{x:.12g}') == float(f'{y:.12g}') for x, y in zip(a, b))
+
+
+# Fixed-seed equivalence checks. For every (n, p, seed) graph, k1 and reweaken semantics:
+#   per-step (new full, new weak, direct full, fully, weakly) of the sparse, dense, frontier and partitioned engines and of the
+#   trajectory replay == the reference spread_activation loop;
+#   run_batch / run_variants (CSR and dense) outcome tuples == the reference outcome of every run.
+# The graph-free deferred engine samples its own graph, so it is checked statistically: its mean fully activated
+# count over deferred_runs runs must lie within 4 standard errors of the sparse engine's.
+# Returns the list of failures (empty when everything matches).
+def check_equivalence():
+    failures = []
+    cases = 0
+    for n in equivalence_n_values:
+        for p in equivalence_p_values:
+            graphs = []
+            for seed in equivalence_seeds:
+                rng = np.random.default_rng(seed)
+                A = erdos_renyi_csr(n, p, rng)
+                initial_activated = rng.choice(n, initial_activated_count, replace=False)
+                D = erdos_renyi_dense(n, p, np.random.default_rng(seed))
+                if not (A.toarray() == D).all():
+                    failures.append(f'erdos_renyi_dense differs from erdos_renyi_csr: n={n} p={p} seed={seed}')
+                graphs.append((A, D, reference_graph(A), initial_activated))
+
+            for reweaken in (True, False):
+                # Without k1 there are no weak nodes, so both semantics are the same
+                for k1 in equivalence_k1_values if reweaken else [k1 for k1 in equivalence_k1_values if k1 is not None]:
+                    outcomes = []
+                    for seed, (A, D, G, initial_activated) in zip(equivalence_seeds, graphs):
+                        cases += 1
+                        trajectory = new_trajectory(n, initial_activated)
+                        reference = run_steps(reference_rounds(G, initial_activated, k1, reweaken, trajectory), initial_activated_count)
+                        candidates = {
+                            'sparse': sparse_rounds(A, initial_states(n, initial_activated, sigma), k1, k2, sigma, reweaken),
+                            'dense': dense_rounds(D, initial_states(n, initial_activated, sigma), k1, k2, sigma, reweaken),
+                            'frontier': frontier_rounds(A, initial_activated, k1, k2, sigma, reweaken),
+                            'partitioned': partitioned_rounds(A, initial_states(n, initial_activated, sigma), k1, k2, sigma, reweaken,
+                                                              threads=partition_threads)}
+                        for name, rounds in candidates.items():
+                            steps = [tuple(int(value) for value in next(rounds)) for _ in reference]
+                            if steps != reference:
+                                failures.append(f'{name} steps differ: n={n} p={p} k1={k1} reweaken={reweaken} seed={seed}\n'
+                                                f'  reference {reference}\n  {name} {steps}')
+
+                        replayed = [tuple(int(value) for value in row) for row in trajectory_steps(trajectory, reweaken)]
+                        if replayed != reference:
+                            failures.append(f'trajectory replay differs: n={n} p={p} k1={k1} reweaken={reweaken} seed={seed}')
+                        outcomes.append(run_outcome(trajectory, reweaken)[:9])
+
+                    batches = {
+                        'run_batch': run_batch([A for A, _, _, _ in graphs], [s for _, _, _, s in graphs], k1, k2, sigma, initial_activated_count, reweaken),
+                        'run_dense_batch': run_dense_batch([D for _, D, _, _ in graphs], [s for _, _, _, s in graphs], k1, k2, sigma,
+                                                           initial_activated_count, reweaken),
+                        'run_variants': [run_variants(A, s, [(k1, k2, sigma)], initial_activated_count, reweaken)[0] for A, _, _, s in graphs],
+                        'run_dense_variants': [run_dense_variants(D, s, [(k1, k2, sigma)], initial_activated_count, reweaken)[0]
+                                               for _, D, _, s in graphs]}
+                    for name, results in batches.items():
+                        for seed, result, outcome in zip(equivalence_seeds, results, outcomes):
+                            if not same_outcome(result, outcome):
+                                failures.append(f'{name} outcome differs: n={n} p={p} k1={k1} reweaken={reweaken} seed={seed}\n'
+                                                f'  reference {outcome}\n  {name} {result}')
+
+            # Deferred engine: same distribution of the final fully activated count as the sparse engine
+            for k1 in (None, 13):
+                rng = np.random.default_rng(12345)
+                deferred, sparse = [], []
+                for _ in range(deferred_runs):
+                    initial_activated = rng.choice(n, initial_activated_count, replace=False)
+                    deferred.append(run_steps(deferred_rounds(n, p, initial_activated, k1, k2, sigma, seed=rng), initial_activated_count)[-1][3])
+                    A = erdos_renyi_csr(n, p, rng)
+                    sparse.append(run_steps(sparse_rounds(A, initial_states(n, initial_activated, sigma), k1, k2, sigma), initial_activated_count)[-1][3])
+                error = np.sqrt(np.var(deferred) / deferred_runs + np.var(sparse) / deferred_runs)
+                if abs(np.mean(deferred) - np.mean(sparse)) > 4 * error + 1e-9:
+                    failures.append(f'deferred mean fully activated {np.mean(deferred):.2f} vs sparse {np.mean(sparse):.2f} '
+                                    f'(4 SE = {4 * error:.2f}): n={n} p={p} k1={k1}')
+        print(f'equivalence: n={n} checked, {len(failures)} failures so far', file=sys.stderr)
+    print(f'equivalence: {cases} cases, {len(failures)} failures')
+    return failures
+
+
+# Function to time one call (seconds)
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+# Function to build the timed run of every engine on one graph (A: CSR, D: dense, G: networkx or None when too large)
+# and seed set: {engine: function running it to convergence}. The graphs are bound here, not captured from the caller's loop.
+def engine_runs(A, D, G, n, p, initial_activated, k1, seed):
+    runs = {'sparse': lambda: run_steps(sparse_rounds(A, initial_states(n, initial_activated, sigma), k1, k2, sigma), initial_activated_count),
+            'dense': lambda: run_steps(dense_rounds(D, initial_states(n, initial_activated, sigma), k1, k2, sigma), initial_activated_count),
+            'frontier': lambda: run_steps(frontier_rounds(A, initial_activated, k1, k2, sigma), initial_activated_count),
+            'partitioned': lambda: run_steps(partitioned_rounds(A, initial_states(n, initial_activated, sigma), k1, k2, sigma,
+                                                                threads=partition_threads), initial_activated_count),
+            'deferred': lambda: run_steps(deferred_rounds(n, p, initial_activated, k1, k2, sigma, seed=seed), initial_activated_count)}
+    if G is not None:
+        runs['networkx'] = lambda: run_steps(reference_rounds(G, initial_activated, k1), initial_activated_count)
+    return runs
+
+
+# Benchmark over the standard matrix: graph generators per (n, p) ('generator:csr', 'generator:dense', 'generator:networkx'
+# and the other graph_models, e.g. 'generator:barabasi_albert'), and every engine's run to convergence on the same graphs
+# per (n, p, k1). Returns {case: median seconds}.
+def run_benchmark():
+    samples = {}
+    for n in benchmark_n_values:
+        for p in benchmark_p_values:
+            small = p * n * (n - 1) / 2 <= networkx_max_edges
+            for seed in range(repeats):
+                rng = np.random.default_rng(seed)
+                seconds, A = timed(erdos_renyi_csr, n, p, np.random.default_rng(seed))
+                samples.setdefault(f'generator:csr|n={n}|p={p}', []).append(seconds)
+                seconds, D = timed(erdos_renyi_dense, n, p, np.random.default_rng(seed))
+                samples.setdefault(f'generator:dense|n={n}|p={p}', []).append(seconds)
+                for model in ('barabasi_albert', 'configuration', 'stochastic_block'):
+                    samples.setdefault(f'generator:{model}|n={n}|p={p}', []).append(timed(sample_model_graph, model, n, p, seed)[0])
+                G = None
+                if small:
+                    seconds, G = timed(lambda: graph_to_csr(nx.erdos_renyi_graph(n, p, seed=seed)))
+                    samples.setdefault(f'generator:networkx|n={n}|p={p}', []).append(seconds)
+                    G = reference_graph(A)
+                initial_activated = rng.choice(n, initial_activated_count, replace=False)
+
+                for k1 in benchmark_k1_values:
+                    runs = engine_runs(A, D, G, n, p, initial_activated, k1, seed)
+                    for name in engines:
+                        if name in runs:
+                            samples.setdefault(f'engine:{name}|n={n}|p={p}|k1={k1}', []).append(timed(runs[name])[0])
+                del A, D, G
+            print(f'benchmark: n={n} p={p} done', file=sys.stderr)
+    return {case: float(np.median(seconds)) for case, seconds in samples.items()}
+
+
+# Function to compare timings against the baseline: [(case, baseline seconds, current seconds)] of the regressions
+def find_regressions(baseline, results):
+    return [(case, baseline[case], seconds) for case, seconds in results.items()
+            if case in baseline and seconds > baseline[case] * (1 + regression_tolerance) and seconds - baseline[case] > regression_min_seconds]
+
+
+# Run the equivalence checks and/or the benchmark; the exit status is 1 on any failure or regression
+if __name__ == '__main__':
+    status = 0
+    if mode in ('equivalence', 'all'):
+        failures = check_equivalence()
+        for failure in failures:
+            print(failure)
+        status |= bool(failures)
+
+    if mode in ('benchmark', 'all'):
+        results = run_benchmark()
+        with open(results_path, 'w') as file:
+            json.dump(results, file, indent=1, sort_keys=True)
+        if update_baseline or not os.path.exists(baseline_path):
+            with open(baseline_path, 'w') as file:
+                json.dump(results, file, indent=1, sort_keys=True)
+            print(f'benchmark: {len(results)} cases written to {baseline_path}')
+        else:
+            with open(baseline_path) as file:
+                regressions = find_regressions(json.load(file), results)
+            for case, before, after in regressions:
+                print(f'REGRESSION {case}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms ({after / before - 1:+.0%})')
+            print(f'benchmark: {len(results)} cases, {len(regressions)} regressions against {baseline_path}')
+            status |= bool(regressions)
+    sys.exit(status)
@@ -0,0 +1,2 @@
+# Weak/full threshold activation on random networks: simulation engines, graph sources, sweep drivers and
+# their result storage. The drivers run as python -m msbp {sweep,nscaling,video} (see msbp.cli).
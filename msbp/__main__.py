@@ -0,0 +1,3 @@
+from msbp.cli import main
+
+main()
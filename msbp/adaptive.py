@@ -0,0 +1,32 @@
+import numpy as np
+from msbp.run_statistics import accumulator_variance
+
+
+# Function to compute a confidence interval for the mean held by a streaming accumulator (run_statistics).
+# Proportions (0/1 values) use the Wilson score interval, which stays honest at 0/n and n/n;
+# everything else uses the normal approximation.
+def confidence_interval(accumulator, proportion=False, confidence=0.95):
+    from scipy import stats  # only the process aggregating the cells needs it
+    count = accumulator['count']
+    if count == 0:
+        return -np.inf, np.inf
+    z = stats.norm.ppf(0.5 + confidence / 2)
+    mean = accumulator['mean']
+    if proportion:
+        mean = min(max(mean, 0.0), 1.0)
+        center = (mean + z ** 2 / (2 * count)) / (1 + z ** 2 / count)
+        half_width = z * np.sqrt(mean * (1 - mean) / count + z ** 2 / (4 * count ** 2)) / (1 + z ** 2 / count)
+        return max(center - half_width, 0.0), min(center + half_width, 1.0)
+    half_width = z * np.sqrt(accumulator_variance(accumulator) / count) if count > 1 else np.inf
+    return mean - half_width, mean + half_width
+
+
+# Function to check whether every metric's confidence interval is narrower than its target width.
+# targets: {metric name: target width}; metrics: {metric name: (accumulator, is a proportion)}
+def intervals_within_targets(targets, metrics, confidence=0.95):
+    for name, width in targets.items():
+        accumulator, proportion = metrics[name]
+        low, high = confidence_interval(accumulator, proportion, confidence)
+        if high - low > width:
+            return False
+    return True
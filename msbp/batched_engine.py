@@ -0,0 +1,118 @@
+import numpy as np
+import scipy.sparse as sp
+
+
+# Function to run several independent experiments at once.
+# The B graphs are stacked into one block-diagonal CSR matrix and the node states form a B x n matrix,
+# so each step is a single sparse matrix-vector product over every run that is still spreading.
+# Runs that have converged drop out of the active batch. Returns one single_experiment tuple per run.
+def run_batch(adjacencies, initial_activated_sets, k1, k2, sigma, initial_activated_count, reweaken=True):
+    B = len(adjacencies)
+    n = adjacencies[0].shape[0]
+    A_full = sp.block_diag(adjacencies, format='csr', dtype=np.int32)
+
+    node_states = np.zeros((B, n), dtype=np.int8)
+    for b, initial_activated in enumerate(initial_activated_sets):
+        node_states[b, np.asarray(initial_activated, dtype=np.intp)] = sigma
+
+    A_active = [A_full]
+
+    def transmission(active):
+        # The active set only shrinks, so a new size means runs dropped out: row-slice the block-diagonal
+        # matrix down to the active runs (columns stay global)
+        if A_active[0].shape[0] != len(active) * n:
+            A_active[0] = A_full[(active[:, None] * n + np.arange(n)).ravel()]
+        return (A_active[0] @ node_states.ravel()).reshape(len(active), n)
+
+    return run_states(transmission, node_states, [(k1, k2, sigma)] * B, initial_activated_count, reweaken)
+
+
+# Function to run every threshold variant (k1, k2, sigma) on one shared graph and initial seed set
+# (common random numbers). The variants form the columns of an n x V state matrix, so each step is a
+# single sparse matrix-matrix product on the shared CSR structure. Returns one tuple per variant.
+def run_variants(A, initial_activated, variants, initial_activated_count, reweaken=True):
+    n = A.shape[0]
+    node_states = np.zeros((len(variants), n), dtype=np.int8)
+    for v, (_, _, sigma) in enumerate(variants):
+        node_states[v, np.asarray(initial_activated, dtype=np.intp)] = sigma
+
+    def transmission(active):
+        return np.asarray(A @ node_states[active].T).T
+
+    return run_states(transmission, node_states, variants, initial_activated_count, reweaken)
+
+
+# Function to advance a B x n state matrix (row b follows thresholds variants[b] = (k1, k2, sigma)) until every
+# row has converged, with the same rules and bookkeeping as single_experiment. Converged rows drop out of the
+# active set; transmission(active) returns the transmission sums of the active rows.
+def run_states(transmission, node_states, variants, initial_activated_count, reweaken=True):
+    B, n = node_states.shape
+    k1 = np.array([np.inf if variant[0] is None else variant[0] for variant in variants])[:, None]
+    k2 = np.array([variant[1] for variant in variants], dtype=float)[:, None]
+    sigma = np.array([variant[2] for variant in variants], dtype=np.int8)[:, None]
+
+    previous_fully_activated_count = np.count_nonzero(node_states == sigma, axis=1)
+    previous_weakly_activated_count = np.count_nonzero(node_states == 1, axis=1)
+    current_fully_activated_count = previous_fully_activated_count.copy()
+    current_weakly_activated_count = previous_weakly_activated_count.copy()
+    penultimate_weak_activation_proportion = np.zeros(B)
+    final_step_full_activation_proportion = np.zeros(B)
+    iteration_count = np.zeros(B, dtype=np.int64)
+    direct_full_activation_count = np.zeros(B, dtype=np.int64)
+    first_step_weak_count = np.zeros(B, dtype=np.int64)
+    first_step_full_count = np.zeros(B, dtype=np.int64)
+
+    active = np.arange(B)
+    first_step = True
+
+    while len(active) > 0:
+        # Update activation status for every active run (same rules as spread_activation)
+        states = node_states[active]
+        active_sigma = sigma[active]
+        transmission_sum = transmission(active)
+        candidates = states != active_sigma
+        fully = candidates & (transmission_sum >= k2[active])
+        weakly = candidates & ~fully & (transmission_sum >= k1[active])
+        if not reweaken:
+            weakly &= states != 1
+        direct_full_activation = np.count_nonzero(fully & (states == 0), axis=1)
+        states = np.where(fully, active_sigma, states)
+        states[weakly] = 1
+        node_states[active] = states
+
+        new_full = np.count_nonzero(fully, axis=1)
+        new_weak = np.count_nonzero(weakly, axis=1)
+
+        if first_step:
+            first_step_weak_count[active] = new_weak
+            first_step_full_count[active] = new_full
+            first_step = False
+
+        current_full = np.count_nonzero(states == active_sigma, axis=1)
+        current_weak = np.count_nonzero(states == 1, axis=1)
+        current_fully_activated_count[active] = current_full
+        current_weakly_activated_count[active] = current_weak
+
+        occurred = (new_full > 0) | (new_weak > 0)
+        penultimate_weak_activation_proportion[active[occurred]] = previous_weakly_activated_count[active[occurred]] / n
+        final_step_full_activation_proportion[active[occurred]] = new_full[occurred] / n
+
+        converged = (current_full == previous_fully_activated_count[active]) & (current_weak == previous_weakly_activated_count[active])
+
+        running = active[~converged]
+        iteration_count[running] += 1
+        previous_fully_activated_count[running] = current_full[~converged]
+        previous_weakly_activated_count[running] = current_weak[~converged]
+        direct_full_activation_count[running] += direct_full_activation[~converged]
+
+        # Drop converged runs from the active batch
+        active = running
+
+    results = []
+    for b in range(B):
+        fully_activated = int(current_fully_activated_count[b])
+        direct_full_activation_ratio = direct_full_activation_count[b] / (fully_activated - initial_activated_count) if fully_activated > initial_activated_count else 0
+        results.append((fully_activated, int(current_weakly_activated_count[b]), int(iteration_count[b]), float(direct_full_activation_ratio),
+                        float(penultimate_weak_activation_proportion[b]), int(first_step_weak_count[b]), int(first_step_full_count[b]),
+                        float(final_step_full_activation_proportion[b]), fully_activated == n))
+    return results
@@ -0,0 +1,43 @@
+import argparse
+import ast
+import importlib
+import multiprocessing
+from msbp.settings import apply_overrides
+
+# Subcommands and the driver module each one runs (its module-level parameters are the defaults)
+commands = {'sweep': ('msbp.sweep', 'k1 x p sweep on G(n, p) or another graph model (formerly parallel.py)'),
+            'nscaling': ('msbp.nscaling', 'n x p scaling study at fixed k1 (formerly random_network_activation_process.py)'),
+            'video': ('msbp.video', 'video of one activation run (formerly "activate video with fully and weakly.py")')}
+
+
+# Function to parse one --set NAME=VALUE; the value is a Python literal, or a plain string if it is not one
+def parse_setting(text):
+    name, separator, value = text.partition('=')
+    if not separator:
+        raise argparse.ArgumentTypeError(f'expected NAME=VALUE, got {text!r}')
+    try:
+        return name.strip(), ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return name.strip(), value
+
+
+# Command line entry point: python -m msbp {sweep,nscaling,video} [--set NAME=VALUE ...] [--start-method METHOD]
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='msbp', description='Weak/full threshold activation on random networks')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    for command, (_, description) in commands.items():
+        subcommand = subcommands.add_parser(command, help=description, description=description)
+        subcommand.add_argument('-s', '--set', dest='settings', action='append', default=[], type=parse_setting, metavar='NAME=VALUE',
+                                help="override a module-level parameter, e.g. --set n=1000 --set \"k1_values=[None, 5]\"")
+        subcommand.add_argument('--start-method', choices=multiprocessing.get_all_start_methods(),
+                                help='how worker processes are started (spawn/forkserver workers import only the simulation core)')
+    args = parser.parse_args(argv)
+
+    if args.start_method is not None:
+        multiprocessing.set_start_method(args.start_method)
+    module_name = commands[args.command][0]
+    try:
+        apply_overrides(module_name, dict(args.settings))
+    except AttributeError as error:
+        parser.error(str(error))
+    importlib.import_module(module_name).main()
@@ -0,0 +1,89 @@
+from msbp.trajectory import record_step
+from msbp.profiling import phase
+
+
+# Function to update activation status with transmission based on state (the reference dict-based loop over a
+# networkx graph). reweaken=True re-reports weak nodes that still meet k1 every step (msbp.sweep semantics);
+# reweaken=False only weakens inactive nodes (msbp.nscaling semantics).
+def spread_activation(G, node_states, k1, k2, sigma, reweaken=True):
+    new_fully_activated = set()
+    new_weakly_activated = set()
+    direct_full_activation = 0
+
+    for node in G.nodes:
+        if node_states[node] == 0 or node_states[node] == 1:
+            neighbors = set(G.neighbors(node))
+            transmission_sum = sum(sigma if node_states[neighbor] == sigma else 1 if node_states[neighbor] == 1 else 0 for neighbor in neighbors)
+
+            if transmission_sum >= k2:
+                new_fully_activated.add(node)
+                if node_states[node] == 0:
+                    direct_full_activation += 1
+            elif k1 is not None and transmission_sum >= k1 and (reweaken or node_states[node] != 1):
+                new_weakly_activated.add(node)
+
+    for node in new_fully_activated:
+        node_states[node] = sigma
+    for node in new_weakly_activated:
+        node_states[node] = 1
+
+    return new_fully_activated, new_weakly_activated, direct_full_activation
+
+
+# Generator yielding per-step counts (new fully, new weakly, direct full, fully activated, weakly activated) for the reference loop
+def networkx_rounds(G, node_states, k1, k2, sigma, reweaken=True, trajectory=None):
+    step = 0
+    while True:
+        new_fully_activated, new_weakly_activated, direct_full_activation = spread_activation(G, node_states, k1, k2, sigma, reweaken)
+        step += 1
+        if trajectory is not None:
+            record_step(trajectory, step, list(new_fully_activated), list(new_weakly_activated))
+        with phase('convergence scan'):
+            counts = sum(1 for state in node_states.values() if state == sigma), sum(1 for state in node_states.values() if state == 1)
+        yield (len(new_fully_activated), len(new_weakly_activated), direct_full_activation) + counts
+
+
+# Function to run an engine's per-step counts until nothing changes and collect the per-run outcome shared by
+# the drivers (the same tuple trajectory.run_outcome recomputes from a stored trajectory):
+# (fully, weakly, iterations, direct full ratio, penultimate weak proportion, first step weak, first step full,
+#  final step full proportion, full activation, whether any step reported an activation)
+def run_to_convergence(rounds, n, initial_activated_count):
+    previous_fully_activated_count = initial_activated_count
+    previous_weakly_activated_count = 0
+    penultimate_weak_activation_proportion = 0
+    final_step_full_activation_proportion = 0
+    final_activation_occurred = False
+
+    iteration_count = 0
+    direct_full_activation_count = 0
+    first_step_weak_count = 0
+    first_step_full_count = 0
+
+    # Spread activation until no more changes
+    while True:
+        with phase('spread'):
+            (new_fully_activated_count, new_weakly_activated_count, direct_full_activation,
+             current_fully_activated_count, current_weakly_activated_count) = next(rounds)
+
+        if iteration_count == 0:
+            first_step_weak_count = new_weakly_activated_count
+            first_step_full_count = new_fully_activated_count
+
+        if new_fully_activated_count > 0 or new_weakly_activated_count > 0:
+            final_activation_occurred = True
+            penultimate_weak_activation_proportion = previous_weakly_activated_count / n
+            final_step_full_activation_proportion = new_fully_activated_count / n
+
+        if (current_fully_activated_count == previous_fully_activated_count and
+                current_weakly_activated_count == previous_weakly_activated_count):
+            break
+
+        iteration_count += 1
+        previous_fully_activated_count = current_fully_activated_count
+        previous_weakly_activated_count = current_weakly_activated_count
+        direct_full_activation_count += direct_full_activation
+
+    direct_full_activation_ratio = direct_full_activation_count / (current_fully_activated_count - initial_activated_count) if current_fully_activated_count > initial_activated_count else 0
+    return (current_fully_activated_count, current_weakly_activated_count, iteration_count, direct_full_activation_ratio,
+            penultimate_weak_activation_proportion, first_step_weak_count, first_step_full_count,
+            final_step_full_activation_proportion, current_fully_activated_count == n, final_activation_occurred)
@@ -0,0 +1,68 @@
+from msbp.dense_engine import available_memory
+
+# Prior run costs for the scheduler (sweep_executor.run_sweep with cell_cost), measured single-core on one machine:
+# seconds per run per node and per undirected edge of each engine (the networkx engine includes building its graph).
+# Only their ratios matter much, the scheduler rescales them by the runtimes it measures as the sweep progresses.
+engine_seconds = {'networkx': (5e-5, 4e-6), 'sparse': (1e-6, 1.5e-7), 'batched': (1e-6, 1.5e-7), 'frontier': (1e-6, 2.5e-7),
+                  'deferred': (1e-6, 1e-7)}
+# Seconds per matrix entry of a run on a dense uint8 matrix, and per edge of building a networkx graph to convert
+dense_entry_seconds = 1e-8
+networkx_edge_seconds = 3e-6
+
+# Peak bytes while a graph is built and held: per undirected edge of a networkx graph and of a CSR matrix (sampling
+# temporaries included), per entry of a dense uint8 matrix, and per node of the engines' state vectors
+networkx_edge_bytes = 160
+csr_edge_bytes = 64
+dense_entry_bytes = 7
+node_bytes = 100
+# Share of the free memory the 'auto' budget lets the workers' graphs take (the rest is interpreters and results)
+auto_budget_share = 0.8
+
+
+# Function to get the prior cost of one run on an n-node graph of expected `density`:
+# (seconds per run, peak bytes of the graphs a worker holds). `graphs` graphs are held at once (e.g. a batch);
+# dense runs the matrix engine on a uint8 matrix; generator 'networkx' builds a networkx graph and converts it.
+def run_cost(n, density, engine='sparse', dense=False, generator='csr', graphs=1):
+    edges = density * n * (n - 1) / 2
+    node_cost, edge_cost = engine_seconds[engine]
+    seconds = node_cost * n + (dense_entry_seconds * n * n if dense else edge_cost * edges)
+    if engine == 'deferred':
+        return seconds, node_bytes * n
+    if engine == 'networkx':
+        return seconds, graphs * (networkx_edge_bytes * edges + node_bytes * n)
+    memory = dense_entry_bytes * n * n if dense else csr_edge_bytes * edges
+    if generator == 'networkx':
+        seconds += networkx_edge_seconds * edges
+        memory += networkx_edge_bytes * edges
+    return seconds, graphs * (memory + node_bytes * n)
+
+
+# Function to turn a memory_budget setting into bytes: 'auto' is a share of the memory free now, None means no cap
+def memory_budget_bytes(setting):
+    if setting != 'auto':
+        return setting
+    memory = available_memory()
+    return int(memory * auto_budget_share) if memory is not None else None
+
+
+# Runtime model the scheduler learns while a sweep runs: measured seconds and runs per cell, and the measured and
+# prior seconds of all finished tasks, whose ratio rescales the priors of cells that have not been measured yet
+def new_runtime_model():
+    return {'cells': {}, 'measured': 0.0, 'predicted': 0.0}
+
+
+# Function to record a finished task of `runs` runs of cell `index` that took `seconds`, with `prior` seconds per run
+def record_runtime(model, index, prior, runs, seconds):
+    cell_seconds, cell_runs = model['cells'].get(index, (0.0, 0))
+    model['cells'][index] = cell_seconds + seconds, cell_runs + runs
+    model['measured'] += seconds
+    model['predicted'] += prior * runs
+
+
+# Function to get the expected seconds per run of a cell: its own measured mean once it has one, else its prior
+# rescaled by how far the priors were off on the tasks measured so far
+def expected_seconds(model, index, prior):
+    if index in model['cells'] and model['cells'][index][1] > 0:
+        cell_seconds, cell_runs = model['cells'][index]
+        return cell_seconds / cell_runs
+    return prior * model['measured'] / model['predicted'] if model['predicted'] > 0 else prior
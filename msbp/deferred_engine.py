@@ -0,0 +1,196 @@
+import copy
+import numpy as np
+from msbp.er_graph import erdos_renyi_csr
+from msbp.trajectory import record_step
+
+
+# Function to draw, for every holder i, sizes[i] distinct members uniformly at random.
+# Returns (holder position, member) pairs; small blocks are sampled in one vectorized argsort.
+def sample_group_neighbors(members, sizes, rng):
+    if len(sizes) * len(members) <= 1 << 20:
+        order = np.argsort(rng.random((len(sizes), len(members))), axis=1)
+        taken = np.arange(len(members)) < sizes[:, None]
+        return np.nonzero(taken)[0], members[order[taken]]
+    owners = np.repeat(np.arange(len(sizes)), sizes)
+    neighbors = np.concatenate([rng.choice(members, size, replace=False) for size in sizes.tolist()])
+    return owners, neighbors
+
+
+# Graph-free activation on G(n, p) by the principle of deferred decisions.
+# An edge is only sampled once one of its endpoints activates, and an inactive node only needs *how many*
+# of its neighbors are full or weak, so those edges are drawn as binomial counts instead of edge lists.
+# Weak nodes that activated in the same step form a group whose still-weak members are exchangeable from
+# an inactive node's point of view (it transmits 0, so it cannot have influenced them): when some of them
+# turn full, the inactive node's share is hypergeometric, and when it activates itself its weak neighbors
+# are drawn uniformly from each group. Only edges between two weak nodes are stored explicitly.
+# Memory is O(n) per live group plus the weak-weak edges.
+# The whole state of a run is one dict, and what has not been revealed yet is independent of it, so a run is a
+# Markov chain that can be copied mid-way and continued with other random draws (clone_deferred_state).
+
+# Function to create the state of a run from its initial activated nodes (their edges to the rest are drawn here)
+def new_deferred_state(n, p, initial_activated, sigma, seed=None):
+    rng = np.random.default_rng(seed)
+    node_states = np.zeros(n, dtype=np.int8)
+    full_neighbors = np.zeros(n, dtype=np.int64)  # revealed full neighbors of every non-full node
+    weak_neighbors = np.zeros(n, dtype=np.int64)  # revealed weak neighbors of every non-full node
+
+    seeds = np.unique(np.asarray(initial_activated, dtype=np.intp))
+    node_states[seeds] = sigma
+    inactive = np.flatnonzero(node_states == 0)
+    full_neighbors[inactive] += rng.binomial(len(seeds), p, size=len(inactive))
+    return {'n': n, 'p': p, 'sigma': sigma, 'rng': rng, 'node_states': node_states, 'full_neighbors': full_neighbors,
+            'weak_neighbors': weak_neighbors,
+            'groups': [],  # [members still weak, per-node neighbor counts of inactive nodes] per weak activation step
+            'weak_adjacency': {},  # weak node -> set of weak neighbors
+            'fully_activated_count': len(seeds), 'weakly_activated_count': 0, 'step': 0}
+
+
+# Function to copy a run's state; the copy draws from `rng` (a generator, or a seed for a new one) from here on
+def clone_deferred_state(state, rng=None):
+    clone = copy.deepcopy({key: value for key, value in state.items() if key != 'rng'})
+    clone['rng'] = np.random.default_rng(rng)
+    return clone
+
+
+# Function to advance a run by one step; returns the step's counts
+# (new fully, new weakly, direct full, fully activated, weakly activated)
+def deferred_step(state, k1, k2, reweaken=True, trajectory=None):
+    n, p, sigma, rng = state['n'], state['p'], state['sigma'], state['rng']
+    node_states, full_neighbors, weak_neighbors = state['node_states'], state['full_neighbors'], state['weak_neighbors']
+    groups, weak_adjacency = state['groups'], state['weak_adjacency']
+
+    transmission_sum = sigma * full_neighbors + weak_neighbors
+    fully = (node_states != sigma) & (transmission_sum >= k2)
+    if k1 is not None:
+        weakly = (node_states == 0) & ~fully & (transmission_sum >= k1)
+    else:
+        weakly = np.zeros_like(fully)
+    new_full = np.flatnonzero(fully & (node_states == 0))
+    weak_to_full = np.flatnonzero(fully & (node_states == 1))
+    new_weak = np.flatnonzero(weakly)
+    reported_weak = len(new_weak) + (state['weakly_activated_count'] - len(weak_to_full) if reweaken else 0)
+
+    # Weak nodes turning full: explicit weak neighbors are updated directly, inactive ones by group
+    if len(weak_to_full) > 0:
+        leaving = np.zeros(n, dtype=bool)
+        leaving[weak_to_full] = True
+        for v in weak_to_full.tolist():
+            for u in weak_adjacency.pop(v):
+                if not leaving[u]:
+                    full_neighbors[u] += 1
+                    weak_neighbors[u] -= 1
+                    weak_adjacency[u].discard(v)
+        for group in groups:
+            members, counts = group
+            left = leaving[members]
+            leaving_count = int(np.count_nonzero(left))
+            if leaving_count == 0:
+                continue
+            holders = np.flatnonzero(counts)
+            moved = rng.hypergeometric(counts[holders], len(members) - counts[holders], leaving_count)
+            counts[holders] -= moved
+            full_neighbors[holders] += moved
+            weak_neighbors[holders] -= moved
+            group[0] = members[~left]
+        groups = state['groups'] = [group for group in groups if len(group[0]) > 0]
+        node_states[weak_to_full] = sigma
+
+    node_states[new_full] = sigma
+    node_states[new_weak] = 1
+    for v in new_weak.tolist():
+        weak_adjacency[v] = set()
+
+    # Newly activated nodes: draw which of the remaining weak nodes they are adjacent to
+    activated = np.concatenate([new_full, new_weak])
+    for members, counts in groups:
+        holders = activated[counts[activated] > 0]
+        if len(holders) == 0:
+            continue
+        owners, neighbors = sample_group_neighbors(members, counts[holders], rng)
+        owners = holders[owners]
+        to_full = node_states[owners] == sigma
+        np.add.at(full_neighbors, neighbors[to_full], 1)
+        np.add.at(weak_neighbors, neighbors[~to_full], 1)
+        for v, u in zip(owners[~to_full].tolist(), neighbors[~to_full].tolist()):
+            weak_adjacency[u].add(v)
+            weak_adjacency[v].add(u)
+        counts[holders] = 0
+
+    # Edges from the newly activated nodes to inactive nodes and among themselves are still unsampled
+    inactive = np.flatnonzero(node_states == 0)
+    if len(new_full) > 0:
+        full_neighbors[inactive] += rng.binomial(len(new_full), p, size=len(inactive))
+        full_neighbors[new_weak] += rng.binomial(len(new_full), p, size=len(new_weak))
+    if len(new_weak) > 0:
+        counts = np.zeros(n, dtype=np.int64)
+        counts[inactive] = rng.binomial(len(new_weak), p, size=len(inactive))
+        weak_neighbors += counts
+        groups.append([new_weak, counts])
+
+        among = erdos_renyi_csr(len(new_weak), p, rng)
+        weak_neighbors[new_weak] += np.diff(among.indptr)
+        for i, v in enumerate(new_weak.tolist()):
+            weak_adjacency[v].update(new_weak[among.indices[among.indptr[i]:among.indptr[i + 1]]].tolist())
+
+    state['fully_activated_count'] += len(new_full) + len(weak_to_full)
+    state['weakly_activated_count'] += len(new_weak) - len(weak_to_full)
+    state['step'] += 1
+    if trajectory is not None:
+        record_step(trajectory, state['step'], np.concatenate([new_full, weak_to_full]), new_weak)
+
+    return (len(new_full) + len(weak_to_full), reported_weak, len(new_full),
+            state['fully_activated_count'], state['weakly_activated_count'])
+
+
+# Generator yielding the per-step counts of a deferred run, the same as frontier_rounds yields for a sampled graph;
+# with a trajectory (trajectory.new_trajectory), records every node's first weak and full step
+def deferred_rounds(n, p, initial_activated, k1, k2, sigma, reweaken=True, seed=None, trajectory=None):
+    state = new_deferred_state(n, p, initial_activated, sigma, seed)
+    while True:
+        yield deferred_step(state, k1, k2, reweaken, trajectory)
+
+
+# Statistical equivalence check against the explicit-graph path: compares the distributions of the
+# per-run outcomes (fully, weakly, iterations, first-step full, first-step weak) with two-sample KS tests.
+# Fails (exit status 1) when the smallest p-value is below alpha / (columns * cases) (Bonferroni correction).
+if __name__ == '__main__':
+    import sys
+    from scipy import stats
+    from msbp.sparse_engine import initial_states, sparse_rounds
+
+    def run_outcome(rounds, initial_activated_count):
+        previous = (initial_activated_count, 0)
+        iteration_count = 0
+        first_step = None
+        while True:
+            new_full, new_weak, _, fully, weakly = next(rounds)
+            if first_step is None:
+                first_step = (new_full, new_weak)
+            if (fully, weakly) == previous:
+                return fully, weakly, iteration_count, first_step[0], first_step[1]
+            previous = (fully, weakly)
+            iteration_count += 1
+
+    rng = np.random.default_rng(2024)
+    runs = 2000
+    alpha = 0.01  # Family-wise significance level of the check
+    cases = [(300, 0.06, 5, 20, 3, True), (300, 0.06, 13, 20, 3, False), (150, 0.12, 8, 20, 3, False),
+             (100, 0.3, None, 20, 3, True), (200, 0.1, 4, 10, 3, True)]
+    failures = []
+    for n, p, k1, k2, sigma, reweaken in cases:
+        explicit = np.array([run_outcome(sparse_rounds(erdos_renyi_csr(n, p, rng), initial_states(n, rng.choice(n, 10, replace=False), sigma),
+                                                       k1, k2, sigma, reweaken), 10) for _ in range(runs)])
+        deferred = np.array([run_outcome(deferred_rounds(n, p, rng.choice(n, 10, replace=False), k1, k2, sigma, reweaken, rng), 10)
+                             for _ in range(runs)])
+        p_values = [stats.ks_2samp(explicit[:, column], deferred[:, column]).pvalue for column in range(explicit.shape[1])]
+        threshold = alpha / (explicit.shape[1] * len(cases))
+        print(f"n={n}, p={p}, k1={k1}, k2={k2}, sigma={sigma}, reweaken={reweaken}: "
+              f"explicit means {explicit.mean(axis=0).round(2)}, deferred means {deferred.mean(axis=0).round(2)}, "
+              f"min KS p-value {min(p_values):.4f} (threshold {threshold:.4f})")
+        if min(p_values) < threshold:
+            failures.append(f"n={n}, p={p}, k1={k1}, k2={k2}, sigma={sigma}, reweaken={reweaken}")
+
+    print(f"deferred equivalence: {len(cases)} cases, {len(failures)} failures at alpha={alpha}")
+    for failure in failures:
+        print(f"FAILED {failure}")
+    sys.exit(bool(failures))
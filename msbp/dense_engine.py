@@ -0,0 +1,103 @@
+import os
+import numpy as np
+from msbp.batched_engine import run_states
+from msbp.sparse_engine import apply_thresholds
+from msbp.trajectory import record_step
+from msbp.profiling import phase
+
+# Expected degree, as a fraction of n, from which a dense uint8 matrix beats CSR (see choose_adjacency)
+dense_crossover = 0.1
+# Bytes of adjacency rows widened to float32 at a time by add_transmission
+block_bytes = 1 << 26
+
+
+# Function to add the transmission change of the nodes whose state changed since the sums were last updated:
+# transmission_sum (rows x n, int32) gains delta (rows x n state change) times the adjacency rows of the changed
+# nodes. The uint8 rows are widened to float32 a block at a time so the update is a BLAS matrix product;
+# transmission sums stay far below 2**24, so float32 holds them exactly and the result matches the CSR product.
+def add_transmission(A, transmission_sum, delta):
+    changed = np.flatnonzero(np.any(delta != 0, axis=0))
+    block = max(1, block_bytes // (4 * A.shape[1]))
+    for start in range(0, len(changed), block):
+        rows = changed[start:start + block]
+        transmission_sum += (delta[:, rows].astype(np.float32) @ A[rows].astype(np.float32)).astype(np.int32)
+
+
+# Generator yielding per-step counts (new fully, new weakly, direct full, fully activated, weakly activated)
+# for a dense uint8 adjacency matrix (er_graph.erdos_renyi_dense), with the same values as sparse_rounds.
+# The transmission sums are kept between steps and only the rows of nodes that changed state are multiplied in,
+# so a whole run reads each adjacency row about once per state change instead of the full matrix every step.
+def dense_rounds(A, node_states, k1, k2, sigma, reweaken=True, trajectory=None):
+    transmission_sum = np.zeros((1, len(node_states)), dtype=np.int32)
+    add_transmission(A, transmission_sum, node_states[None])
+    step = 0
+    while True:
+        previous_states = node_states.copy()
+        new_fully_activated, new_weakly_activated, direct_full_activation = apply_thresholds(transmission_sum[0], node_states, k1, k2, sigma, reweaken)
+        add_transmission(A, transmission_sum, (node_states - previous_states)[None])
+        step += 1
+        if trajectory is not None:
+            record_step(trajectory, step, new_fully_activated, new_weakly_activated)
+        with phase('convergence scan'):
+            counts = int(np.count_nonzero(node_states == sigma)), int(np.count_nonzero(node_states == 1))
+        yield (len(new_fully_activated), len(new_weakly_activated), direct_full_activation) + counts
+
+
+# Function to run several independent experiments on dense adjacency matrices at once (batched_engine.run_batch
+# for dense graphs): the B x n state matrix advances together and each run's sums are updated from its own matrix.
+def run_dense_batch(adjacencies, initial_activated_sets, k1, k2, sigma, initial_activated_count, reweaken=True):
+    B = len(adjacencies)
+    n = adjacencies[0].shape[0]
+    node_states = np.zeros((B, n), dtype=np.int8)
+    for b, initial_activated in enumerate(initial_activated_sets):
+        node_states[b, np.asarray(initial_activated, dtype=np.intp)] = sigma
+    transmission_sum = np.zeros((B, n), dtype=np.int32)
+    summed_states = np.zeros((B, n), dtype=np.int8)  # states the sums were computed from
+
+    def transmission(active):
+        for b in active:
+            add_transmission(adjacencies[b], transmission_sum[b:b + 1], (node_states[b] - summed_states[b])[None])
+        summed_states[active] = node_states[active]
+        return transmission_sum[active]
+
+    return run_states(transmission, node_states, [(k1, k2, sigma)] * B, initial_activated_count, reweaken)
+
+
+# Function to run every threshold variant (k1, k2, sigma) on one shared dense graph and initial seed set
+# (batched_engine.run_variants for dense graphs): the changed rows of all variants go through one matrix product.
+def run_dense_variants(A, initial_activated, variants, initial_activated_count, reweaken=True):
+    n = A.shape[0]
+    node_states = np.zeros((len(variants), n), dtype=np.int8)
+    for v, (_, _, sigma) in enumerate(variants):
+        node_states[v, np.asarray(initial_activated, dtype=np.intp)] = sigma
+    transmission_sum = np.zeros((len(variants), n), dtype=np.int32)
+    summed_states = np.zeros((len(variants), n), dtype=np.int8)
+
+    def transmission(active):
+        active_sum = transmission_sum[active]
+        add_transmission(A, active_sum, node_states[active] - summed_states[active])
+        transmission_sum[active] = active_sum
+        summed_states[active] = node_states[active]
+        return active_sum
+
+    return run_states(transmission, node_states, variants, initial_activated_count, reweaken)
+
+
+# Function to estimate the memory (bytes) each of `processes` workers can use, or None when the OS does not say
+def available_memory(processes=1):
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') // processes
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+# Cost model: pick 'dense' or 'sparse' adjacency for G(n, p) cells holding `graphs` graphs at once per worker.
+# CSR stores 8 bytes (int32 index and value) per directed edge, about 8 p n^2 bytes, and reads all of them every
+# step; the uint8 matrix takes n^2 bytes and is read about once per run. Dense wins once the expected degree
+# p (n - 1) reaches dense_crossover * n, as long as its matrices (and one widened block) fit in the memory budget.
+def choose_adjacency(n, p, graphs=1, processes=1, memory=None):
+    memory = available_memory(processes) if memory is None else memory
+    dense_bytes = graphs * n * n + min(block_bytes, 4 * n * n)
+    if memory is not None and dense_bytes > memory:
+        return 'sparse'
+    return 'dense' if p * (n - 1) >= dense_crossover * n else 'sparse'
@@ -0,0 +1,138 @@
+import numpy as np
+import scipy.sparse as sp
+
+
+# Function to sample which of `total` candidate pairs become edges, each independently with probability p.
+# Sparse p uses geometric edge skipping; dense p samples the (sparse) complement and removes it.
+def sample_pair_indices(total, p, rng):
+    if p <= 0 or total == 0:
+        return np.empty(0, dtype=np.int64)
+    if p >= 1:
+        return np.arange(total, dtype=np.int64)
+    if p > 0.5:
+        keep = np.ones(total, dtype=bool)
+        keep[sample_pair_indices(total, 1 - p, rng)] = False
+        return np.flatnonzero(keep)
+
+    chunks = []
+    last = -1
+    while True:
+        remaining = (total - last - 1) * p
+        size = int(remaining + 5 * np.sqrt(remaining) + 16)
+        positions = last + np.cumsum(rng.geometric(p, size))
+        positions = positions[positions < total]
+        chunks.append(positions)
+        if len(positions) < size:
+            break
+        last = positions[-1]
+    return np.concatenate(chunks)
+
+
+# Function to build a symmetric int32 CSR adjacency from its strict upper triangle (sorted CSR rows)
+def upper_to_csr(n, upper_indptr, upper_indices):
+    m = len(upper_indices)
+    upper_count = np.diff(upper_indptr)
+    # The transpose (lower triangle) comes from scipy's O(n + m) CSR -> CSC conversion, already sorted
+    U = sp.csr_matrix((np.ones(m, dtype=np.int32), upper_indices, upper_indptr), shape=(n, n))
+    L = U.tocsc()
+    lower_count = np.diff(L.indptr)
+
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(lower_count + upper_count, out=indptr[1:])
+    indices = np.empty(2 * m, dtype=np.int32)
+
+    # Each row lists its smaller neighbors first, then its larger ones
+    rows = np.repeat(np.arange(n), lower_count)
+    indices[indptr[rows] + np.arange(m) - L.indptr[rows]] = L.indices
+    rows = np.repeat(np.arange(n), upper_count)
+    indices[indptr[rows] + lower_count[rows] + np.arange(m) - upper_indptr[rows]] = upper_indices
+
+    if indptr[-1] <= np.iinfo(np.int32).max:
+        indptr = indptr.astype(np.int32)
+    A = sp.csr_matrix((np.ones(2 * m, dtype=np.int32), indices, indptr), shape=(n, n))
+    A.has_sorted_indices = True
+    return A
+
+
+# Function to get the linear upper-triangle index (row-major over u < v) of the first pair of every row, plus the total
+def upper_row_starts(n):
+    return np.arange(n + 1, dtype=np.int64) * (2 * n - np.arange(n + 1, dtype=np.int64) - 1) // 2
+
+
+# Function to build the CSR adjacency of the pairs at sorted linear upper-triangle indices
+def pairs_to_csr(n, pair_indices):
+    row_starts = upper_row_starts(n)
+
+    # Map each linear upper-triangle index (row-major over u < v) back to its pair
+    upper_indptr = np.searchsorted(pair_indices, row_starts)
+    u = np.repeat(np.arange(n, dtype=np.int64), np.diff(upper_indptr))
+    v = (pair_indices - row_starts[u] + u + 1).astype(np.int32)
+    return upper_to_csr(n, upper_indptr, v)
+
+
+# Function to sample G(n, p) straight into int32 CSR adjacency without building a networkx graph.
+# `seed` may be None, an int or a numpy Generator.
+def erdos_renyi_csr(n, p, seed=None):
+    rng = np.random.default_rng(seed)
+    return pairs_to_csr(n, sample_pair_indices(n * (n - 1) // 2, p, rng))
+
+
+# Function to sample G(n, p) straight into a dense uint8 adjacency matrix (n * n bytes), drawing exactly the
+# same graph as erdos_renyi_csr for the same seed. Dense p removes the sampled complement from a complete graph,
+# so neither representation ever holds the index list of a nearly complete graph.
+def erdos_renyi_dense(n, p, seed=None, block_pairs=1 << 22):
+    rng = np.random.default_rng(seed)
+    total = n * (n - 1) // 2
+    row_starts = upper_row_starts(n)
+    complement = 0.5 < p < 1
+    A = np.ones((n, n), dtype=np.uint8) if complement or p >= 1 else np.zeros((n, n), dtype=np.uint8)
+    np.fill_diagonal(A, 0)
+    if p >= 1 or p <= 0:
+        return A
+
+    # Same draws as sample_pair_indices: the pairs themselves, or the pairs missing from the complete graph
+    pair_indices = sample_pair_indices(total, 1 - p if complement else p, rng)
+    value = 0 if complement else 1
+    for start in range(0, len(pair_indices), block_pairs):
+        block = pair_indices[start:start + block_pairs]
+        u = np.searchsorted(row_starts, block, side='right') - 1
+        v = block - row_starts[u] + u + 1
+        A[u, v] = value
+        A[v, u] = value
+    return A
+
+
+# Generator of nested G(n, p) graphs over an increasing p grid (coupled sweeps): every pair gets one uniform draw U
+# and the graph at level p holds the pairs with U < p, so each level only adds edges to the one before and every
+# level on its own is G(n, p). Only the pairs below the largest p are drawn (sample_pair_indices at that p, with U
+# uniform below it), and they are sorted by U once. Yields each level's adjacency: CSR, merged incrementally from the
+# previous level's pairs, or where `dense` (a flag, or one per level) is set, one uint8 matrix that the new edges are
+# written into in place (use it before advancing the generator).
+def nested_erdos_renyi(n, p_values, seed=None, dense=False):
+    rng = np.random.default_rng(seed)
+    top = min(max(p_values, default=0), 1)
+    pair_indices = sample_pair_indices(n * (n - 1) // 2, top, rng)
+    draws = rng.random(len(pair_indices)) * top
+    order = np.argsort(draws, kind='stable')
+    pair_indices, draws = pair_indices[order], draws[order]
+    ends = [len(draws) if p >= 1 else int(np.searchsorted(draws, p)) for p in p_values]
+
+    row_starts = upper_row_starts(n)
+    A = None
+    included = np.empty(0, dtype=np.int64)
+    merged = filled = 0  # prefixes of pair_indices already in `included` and in A
+    for end, level_dense in zip(ends, np.broadcast_to(dense, len(ends))):
+        if level_dense:
+            A = np.zeros((n, n), dtype=np.uint8) if A is None else A
+            new = pair_indices[filled:end]
+            u = np.searchsorted(row_starts, new, side='right') - 1
+            v = new - row_starts[u] + u + 1
+            A[u, v] = 1
+            A[v, u] = 1
+            filled = end
+            yield A
+        else:
+            # Both parts are sorted, so the stable sort (timsort) merges them in linear time
+            included = np.sort(np.concatenate([included, np.sort(pair_indices[merged:end])]), kind='stable')
+            merged = end
+            yield pairs_to_csr(n, included)
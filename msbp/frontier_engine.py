@@ -0,0 +1,70 @@
+import numpy as np
+from msbp.trajectory import record_step
+
+
+# Function to gather the CSR neighbor lists of `rows` as one flat array (plus the row position each entry came from)
+def gather_neighbors(indptr, indices, rows):
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    total = int(lengths.sum())
+    owner = np.repeat(np.arange(len(rows)), lengths)
+    offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return indices[starts[owner] + offsets], owner
+
+
+# Generator for event-driven activation: keeps a running transmission total per node and, when nodes
+# turn weak or full, pushes only their delta (1, sigma - 1 or sigma) to their neighbors. Only nodes whose
+# total changed are re-examined and the activation counts are tracked incrementally.
+# Yields (new fully, new weakly, direct full, fully activated count, weakly activated count) per step,
+# with the same values as spread_activation followed by the two state scans of the driver loop.
+# With a trajectory (trajectory.new_trajectory) every node's first weak and full step are recorded as well.
+def frontier_rounds(A, initial_activated, k1, k2, sigma, reweaken=True, trajectory=None):
+    n = A.shape[0]
+    indptr, indices = A.indptr, A.indices
+    node_states = np.zeros(n, dtype=np.int8)
+    seeds = np.unique(np.asarray(initial_activated, dtype=np.intp))
+    node_states[seeds] = sigma
+
+    transmission_sum = np.zeros(n, dtype=np.int64)
+    neighbors, _ = gather_neighbors(indptr, indices, seeds)
+    np.add.at(transmission_sum, neighbors, sigma)
+
+    fully_activated_count = len(seeds)
+    weakly_activated_count = 0
+    # The first step examines every node; afterwards only nodes whose total changed
+    touched = np.flatnonzero(node_states != sigma)
+    step = 0
+
+    while True:
+        totals = transmission_sum[touched]
+        states = node_states[touched]
+        fully = totals >= k2
+        if k1 is not None:
+            weakly = ~fully & (states == 0) & (totals >= k1)
+        else:
+            weakly = np.zeros_like(fully)
+
+        new_full = touched[fully]
+        new_weak = touched[weakly]
+        weak_to_full = int(np.count_nonzero(states[fully] == 1))
+        direct_full_activation = len(new_full) - weak_to_full
+
+        # Weak nodes always keep a total >= k1, so spread_activation reports every one that stays weak again
+        reported_weak = len(new_weak) + (weakly_activated_count - weak_to_full if reweaken else 0)
+
+        deltas = np.concatenate([sigma - node_states[new_full].astype(np.int64), np.ones(len(new_weak), dtype=np.int64)])
+        node_states[new_full] = sigma
+        node_states[new_weak] = 1
+        fully_activated_count += len(new_full)
+        weakly_activated_count += len(new_weak) - weak_to_full
+        step += 1
+        if trajectory is not None:
+            record_step(trajectory, step, new_full, new_weak)
+
+        changed = np.concatenate([new_full, new_weak])
+        neighbors, owner = gather_neighbors(indptr, indices, changed)
+        np.add.at(transmission_sum, neighbors, deltas[owner])
+        touched = np.unique(neighbors)
+        touched = touched[node_states[touched] != sigma]
+
+        yield len(new_full), reported_weak, direct_full_activation, fully_activated_count, weakly_activated_count
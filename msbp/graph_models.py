@@ -0,0 +1,196 @@
+import os
+import numpy as np
+from msbp.er_graph import sample_pair_indices, upper_to_csr, erdos_renyi_csr
+
+# Graph models the drivers can sweep. p plays the role it has in G(n, p): the expected degree is about p (n - 1)
+# ('stochastic_block': p is the within-block edge probability), except for 'edge_list', where p is the probability
+# of keeping each edge of the file (bond percolation; p = 1 is the network itself).
+graph_models = ('er', 'barabasi_albert', 'configuration', 'stochastic_block', 'edge_list')
+
+# Edge lists already loaded by this process: path -> (n, upper-triangle rows, upper-triangle columns, CSR adjacency)
+loaded_edge_lists = {}
+
+
+# Function to build a symmetric int32 CSR adjacency from an undirected edge list (any order, either direction).
+# Self-loops and repeated edges are dropped, so multigraph generators give their simple (erased) graph.
+def edges_to_csr(n, u, v):
+    low, high = upper_edges(n, u, v)
+    return upper_to_csr(n, np.searchsorted(low, np.arange(n + 1)), high.astype(np.int32))
+
+
+# Function to reduce an edge list to its distinct u < v pairs, sorted by (u, v)
+def upper_edges(n, u, v):
+    u = np.asarray(u, dtype=np.int64)
+    v = np.asarray(v, dtype=np.int64)
+    keep = u != v
+    pairs = np.minimum(u[keep], v[keep]) * n + np.maximum(u[keep], v[keep])
+    pairs.sort()
+    pairs = pairs[np.concatenate([[True], pairs[1:] != pairs[:-1]])] if len(pairs) else pairs
+    return pairs // n, pairs % n
+
+
+# Function to map arbitrary node ids to 0..n-1 in sorted order: returns (number of distinct ids, labels).
+# Ids spanning a range of at most a few times their count go through a lookup table; others are binary searched.
+def relabel_nodes(ids):
+    ids = np.asarray(ids, dtype=np.int64)
+    distinct = np.sort(ids, axis=None)
+    distinct = distinct[np.concatenate([[True], distinct[1:] != distinct[:-1]])] if len(distinct) else distinct
+    if len(distinct) and distinct[-1] - distinct[0] < 4 * ids.size:
+        table = np.zeros(distinct[-1] - distinct[0] + 1, dtype=np.int64)
+        table[distinct - distinct[0]] = np.arange(len(distinct))
+        return len(distinct), table[ids - distinct[0]]
+    return len(distinct), np.searchsorted(distinct, ids)
+
+
+# Function to sample a Barabasi-Albert graph with m edges per new node, in linear time without networkx
+# (Batagelj-Brandes: edge e of node e // m attaches to the endpoint at a uniform earlier position of the edge
+# endpoint list, i.e. proportionally to degree). The copies are resolved for all edges at once by pointer jumping;
+# self-loops and repeated edges are dropped.
+def barabasi_albert_csr(n, m, seed=None):
+    rng = np.random.default_rng(seed)
+    edges = n * m
+    if edges == 0:
+        return edges_to_csr(n, [], [])
+    owner = np.repeat(np.arange(n, dtype=np.int64), m)
+    # Endpoint list: position 2e holds the owner of edge e, position 2e + 1 a copy of position chosen[e] <= 2e
+    chosen = (rng.random(edges) * (2 * np.arange(edges) + 1)).astype(np.int64)
+    position = chosen.copy()
+    copies = np.flatnonzero(position & 1)
+    while len(copies):
+        position[copies] = chosen[position[copies] >> 1]
+        copies = copies[(position[copies] & 1) == 1]
+    return edges_to_csr(n, owner, owner[position >> 1])
+
+
+# Function to get a power-law degree sequence with mean about `mean_degree` (largest degree n - 1):
+# degree i is proportional to (i + 1) ** (-1 / (exponent - 1)), the expected degrees of a Chung-Lu power law
+def powerlaw_degrees(n, mean_degree, exponent=2.5):
+    weights = np.arange(1, n + 1, dtype=float) ** (-1 / (exponent - 1))
+    degrees = np.minimum(np.round(weights * mean_degree * n / weights.sum()), n - 1).astype(np.int64)
+    degrees[0] += degrees.sum() % 2  # stubs pair up
+    return degrees
+
+
+# Function to sample the erased configuration model of a degree sequence: every node gets degree[i] stubs,
+# a random permutation pairs them, and self-loops and repeated edges are dropped
+def configuration_csr(degrees, seed=None):
+    rng = np.random.default_rng(seed)
+    degrees = np.asarray(degrees, dtype=np.int64)
+    stubs = rng.permutation(np.repeat(np.arange(len(degrees), dtype=np.int64), degrees))
+    stubs = stubs[:len(stubs) // 2 * 2]
+    return edges_to_csr(len(degrees), stubs[0::2], stubs[1::2])
+
+
+# Function to sample a stochastic block model: nodes are numbered block by block and a pair in blocks (a, b) is an
+# edge with probability probabilities[a][b]. Every block pair is sampled by geometric edge skipping like G(n, p).
+def stochastic_block_csr(sizes, probabilities, seed=None):
+    rng = np.random.default_rng(seed)
+    starts = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+    u, v = [], []
+    for a in range(len(sizes)):
+        for b in range(a, len(sizes)):
+            q = min(max(probabilities[a][b], 0), 1)
+            if a == b:
+                size = sizes[a]
+                row_starts = np.arange(size + 1, dtype=np.int64) * (2 * size - np.arange(size + 1, dtype=np.int64) - 1) // 2
+                pair_indices = sample_pair_indices(size * (size - 1) // 2, q, rng)
+                rows = np.searchsorted(row_starts, pair_indices, side='right') - 1
+                u.append(starts[a] + rows)
+                v.append(starts[a] + pair_indices - row_starts[rows] + rows + 1)
+            else:
+                pair_indices = sample_pair_indices(sizes[a] * sizes[b], q, rng)
+                u.append(starts[a] + pair_indices // sizes[b])
+                v.append(starts[b] + pair_indices % sizes[b])
+    return edges_to_csr(int(starts[-1]), np.concatenate(u), np.concatenate(v))
+
+
+# Function to read the raw (u, v) rows of an edge-list file without parsing it more than once:
+# '.npy' (an m x 2 integer array) and '.bin' (raw int32 pairs, or `dtype`) are memory-mapped; text files
+# (two node ids per line, whitespace or `delimiter` separated, '#' and '%' comments) are parsed once and
+# cached as '<path>.npy' next to them, so later loads (every worker process) memory-map the cache.
+def read_edge_list(path, delimiter=None, dtype='int32'):
+    if path.endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    if path.endswith('.bin'):
+        return np.memmap(path, dtype=dtype, mode='r').reshape(-1, 2)
+    cache = path + '.npy'
+    if not os.path.exists(cache) or os.path.getmtime(cache) < os.path.getmtime(path):
+        edges = np.loadtxt(path, dtype=np.int64, comments=('#', '%'), delimiter=delimiter, usecols=(0, 1), ndmin=2)
+        np.save(cache + '.tmp.npy', edges)
+        os.replace(cache + '.tmp.npy', cache)
+    return np.load(cache, mmap_mode='r')
+
+
+# Function to load an edge-list file as (n, upper-triangle rows, upper-triangle columns, CSR adjacency), once per process.
+# With relabel, node ids are mapped to 0..n-1 in sorted order (nodes without edges disappear); otherwise the ids
+# are used as they are and n is the largest id + 1.
+def load_edge_list(path, relabel=True, delimiter=None, dtype='int32'):
+    if path not in loaded_edge_lists:
+        edges = read_edge_list(path, delimiter, dtype)
+        if relabel:
+            n, labels = relabel_nodes(edges)
+            u, v = labels[:, 0], labels[:, 1]
+        else:
+            u, v = np.asarray(edges[:, 0]), np.asarray(edges[:, 1])
+            n = int(max(u.max(initial=-1), v.max(initial=-1))) + 1
+        low, high = upper_edges(n, u, v)
+        A = upper_to_csr(n, np.searchsorted(low, np.arange(n + 1)), high.astype(np.int32))
+        loaded_edge_lists[path] = n, low, high, A
+    return loaded_edge_lists[path]
+
+
+# Function to keep every edge of a loaded edge list independently with probability p
+def percolate_edge_list(n, low, high, A, p, rng):
+    if p >= 1:
+        return A
+    kept = sample_pair_indices(len(low), p, rng)
+    return upper_to_csr(n, np.searchsorted(low[kept], np.arange(n + 1)), high[kept].astype(np.int32))
+
+
+# Function to sample a graph of `model` (see graph_models) as int32 CSR adjacency. params are the model's own settings:
+#   'barabasi_albert': none (m = round(p (n - 1) / 2) edges per node)
+#   'configuration': exponent (power-law degree exponent, default 2.5) or degrees (a fixed degree sequence)
+#   'stochastic_block': sizes (block sizes, default two equal blocks) and mixing (block-pair probabilities relative
+#                       to p, default 1 within and 0.1 between blocks)
+#   'edge_list': path, and optionally relabel, delimiter and dtype (see load_edge_list); n must match the file
+def sample_model_graph(model, n, p, seed=None, **params):
+    rng = np.random.default_rng(seed)
+    if model == 'er':
+        return erdos_renyi_csr(n, p, rng)
+    if model == 'barabasi_albert':
+        return barabasi_albert_csr(n, int(round(p * (n - 1) / 2)), rng)
+    if model == 'configuration':
+        degrees = params.get('degrees')
+        return configuration_csr(powerlaw_degrees(n, p * (n - 1), params.get('exponent', 2.5)) if degrees is None else degrees, rng)
+    if model == 'stochastic_block':
+        sizes, mixing = block_settings(n, params)
+        return stochastic_block_csr(sizes, p * np.asarray(mixing, dtype=float), rng)
+    if model == 'edge_list':
+        graph = load_edge_list(params['path'], params.get('relabel', True), params.get('delimiter'), params.get('dtype', 'int32'))
+        if graph[0] != n:
+            raise ValueError(f"{params['path']} has {graph[0]} nodes, but n is {n}")
+        return percolate_edge_list(*graph, p, rng)
+    raise ValueError(f'Unknown graph model {model!r} (expected one of {graph_models})')
+
+
+# Function to get the block sizes and relative mixing matrix of a stochastic block model
+def block_settings(n, params):
+    sizes = params.get('sizes', [n // 2, n - n // 2])
+    mixing = params.get('mixing', [[1 if a == b else 0.1 for b in range(len(sizes))] for a in range(len(sizes))])
+    if sum(sizes) != n:
+        raise ValueError(f'Block sizes {sizes} do not add up to n = {n}')
+    return sizes, mixing
+
+
+# Function to get the expected edge density (expected degree / (n - 1)) of a model's graphs, which is what
+# dense_engine.choose_adjacency needs in place of p
+def expected_density(model, n, p, **params):
+    if model == 'stochastic_block':
+        sizes, mixing = block_settings(n, params)
+        sizes = np.asarray(sizes, dtype=float)
+        pairs = np.outer(sizes, sizes) - np.diag(sizes)
+        return float(np.sum(pairs * np.minimum(p * np.asarray(mixing, dtype=float), 1)) / max(n * (n - 1), 1))
+    if model == 'edge_list':
+        graph = load_edge_list(params['path'], params.get('relabel', True), params.get('delimiter'), params.get('dtype', 'int32'))
+        return p * 2 * len(graph[1]) / max(n * (n - 1), 1)
+    return p
@@ -0,0 +1,270 @@
+import json
+import multiprocessing
+import time
+import numpy as np
+import random
+from msbp.core import networkx_rounds, run_to_convergence
+from msbp.settings import apply_overrides, run_with_overrides
+from msbp.sparse_engine import graph_to_csr, initial_states, sparse_rounds
+from msbp.frontier_engine import frontier_rounds
+from msbp.partitioned_engine import partitioned_rounds
+from msbp.dense_engine import dense_rounds, choose_adjacency
+from msbp.er_graph import erdos_renyi_csr, erdos_renyi_dense
+from msbp.graph_models import sample_model_graph, expected_density
+from msbp.deferred_engine import deferred_rounds
+from msbp.result_store import open_store, cell_key, chunk_seed, load_chunks, save_chunk
+from msbp.trajectory import new_trajectory, save_trajectories, trajectory_path
+from msbp.sweep_executor import run_sweep
+from msbp.cost_model import run_cost, memory_budget_bytes
+from msbp.work_queue import open_queue, run_worker
+from msbp.profiling import phase, count_run, profile_call, profile_record, write_record, print_progress
+from msbp.run_statistics import spread_names, accumulator_mean, accumulator_spread, new_summary, add_to_summary, merge_summaries
+
+# Parameters
+k1 = 13  # Fixed k1 value
+k2 = 20  # Total transmitted value required for full activation
+initial_activated_count = 10  # Number of initial activated nodes
+total_experiments = 1000  # Total number of experiments for each p
+sigma = 3  # Transmission value for fully activated nodes
+n_values = range(500, 10001, 500)  # Node counts from 500 to 10000 with a step of 500
+p_values = np.arange(0, 1.02, 0.02)  # Edge probabilities per n; cells already in the result store are not rerun, so extending the grid only costs the new p
+engine = 'sparse'  # 'networkx' (reference dict-based loop), 'sparse' (matrix-vector product, see adjacency), 'frontier' (incremental) or 'deferred' (graph-free, O(n) memory)
+graph_generator = 'csr'  # 'csr' (sample G(n,p) straight into CSR) or 'networkx' (nx.erdos_renyi_graph, converted) for the CSR engines
+graph_model = 'er'  # 'er' (G(n,p)), 'barabasi_albert', 'configuration', 'stochastic_block' or 'edge_list', built straight into CSR (graph_models.py); p sets the expected degree p (n - 1), or the edge retention of an edge list. The 'deferred' and 'networkx' engines need 'er'
+graph_model_params = {}  # Settings of the graph model, e.g. {'path': 'network.txt'} for 'edge_list' (n_values must be its node count); see graph_models.sample_model_graph
+adjacency = 'auto'  # Graph matrix of the 'sparse' engine: 'sparse' (CSR), 'dense' (uint8, BLAS products) or 'auto' (per cell from n, p and free memory); results are identical
+engine_version = 3  # Bump when simulation semantics (or the stored format) change so stored results are not reused
+seed = 2024  # Sweep seed; every (n, p) cell derives its own seed from it (None for unseeded runs)
+store_path = 'activation_process_n_values.sqlite'  # Result store of cell summaries; a rerun only computes missing runs (None to disable)
+spread_columns = True  # Also report the variance and 5%/50%/95% quantiles of every metric
+results_path = 'activation_process_n_values.parquet'  # Columnar results (Parquet dataset partitioned by n; None to skip)
+csv_path = 'activation_process_n_values.csv'  # CSV export of the same rows (None to skip)
+record_trajectories = False  # Also store every run's per-node weak/full activation steps, one file per computed block of runs
+trajectory_dir = 'trajectories_n_values'  # Directory of the stored trajectories (trajectory.load_trajectories / run_outcome replay them)
+role = 'local'  # 'local' (serial on this machine, or a pool of `processes`), 'coordinator' (lease the grid out through queue_path and merge the results) or 'worker'
+queue_path = 'activation_process_n_values.queue.sqlite'  # Work queue on a directory every machine can reach; it also stores the finished chunks
+processes = 1  # Worker processes of the 'local' role; above 1 the grid runs on a pool through the cost-aware scheduler, in chunks of chunk_size
+run_threads = 1  # Threads each 'sparse' CSR run is split over by blocks of rows (partitioned_engine.py), for graphs so large that a single run is the bottleneck (large n_values, loaded networks); results are identical (keep processes x run_threads near the core count)
+chunk_size = 50  # Experiments per lease in coordinator/worker mode (per chunk on a local pool)
+local_workers = 0  # Worker processes the coordinator starts on its own machine (more can join with role = 'worker')
+schedule_by_cost = True  # Cost-aware scheduling of the pool (sweep_executor.run_sweep): largest (n, p) cells first, cheap chunks grouped into tasks of about task_seconds, graph memory of running tasks capped at memory_budget; results are unchanged
+memory_budget = 'auto'  # Bytes the graphs of concurrently running tasks may take together ('auto': 80% of the memory free at the start, None: no cap)
+task_seconds = 2.0  # Target compute time of a task of grouped chunks
+profile = False  # Profile every cell: one JSONL record per cell (phase times, runs/s, iterations per run, peak memory allocated per chunk) plus a live progress/ETA line
+profile_path = 'activation_process_n_values.profile.jsonl'  # Where the profile records are appended
+
+# Parameters set from the command line (msbp.cli --set); worker processes apply them too
+overrides = {}
+
+metric_names = ['Average Fully Activated Nodes', 'Average Weakly Activated Nodes', 'Full Activation Proportion',
+                'Average Iterations for Full Activation', 'Average Direct Full Activation Proportion',
+                'Penultimate Weak Activation Proportion', 'First Step Weak Activation Count',
+                'First Step Full Activation Count', 'Final Step Full Activation Proportion']
+
+# Function to get the histogram range (low, high, bins) of every metric of an n-node cell; they feed the quantile columns
+# (a run changes at least one node's state per iteration and each node changes at most twice, so it takes at most 2n iterations)
+def metric_ranges(n):
+    return {'Average Fully Activated Nodes': (0, n, 100), 'Average Weakly Activated Nodes': (0, n, 100),
+            'Full Activation Proportion': (0, 1, 2), 'Average Iterations for Full Activation': (0, 2 * n, min(2 * n, 1000)),
+            'Average Direct Full Activation Proportion': (0, 1, 100),
+            'Penultimate Weak Activation Proportion': (0, 1, 100),
+            'First Step Weak Activation Count': (0, n, 100), 'First Step Full Activation Count': (0, n, 100),
+            'Final Step Full Activation Proportion': (0, 1, 100)}
+
+# Function to get the number of runs a summary holds
+def summary_runs(summary):
+    return summary['Full Activation Proportion']['count']
+
+# Function to build the store key of an (n, p) cell; chunked sweeps (coordinator/worker, local pool) store fixed-size chunks
+# instead of top-up blocks, so their keys include chunk_size
+def cell_store_key(n, p, chunked=False):
+    return cell_key(n=n, p=p, k1=k1, k2=k2, sigma=sigma, initial_activated_count=initial_activated_count, seed=seed,
+                    engine=engine, engine_version=engine_version, graph_generator=graph_generator,
+                    **({'chunk_size': chunk_size} if chunked else {}),
+                    **({} if graph_model == 'er' else {'graph_model': graph_model, 'graph_model_params': graph_model_params}))
+
+# Function to decide whether the 'sparse' engine holds an (n, p) cell's graphs as dense uint8 matrices
+def use_dense(n, density):
+    return engine == 'sparse' and (choose_adjacency(n, density, 1, processes) if adjacency == 'auto' else adjacency) == 'dense'
+
+# Function to get an (n, p) cell's prior cost for the scheduler (cost_model.run_cost): (seconds per run, bytes a task holds)
+def cell_cost(n, p):
+    density = expected_density(graph_model, n, p, **graph_model_params)
+    return run_cost(n, density, engine, use_dense(n, density), graph_generator if graph_model == 'er' else 'csr')
+
+# Function to run `count` experiments of one (n, p) cell and return their summary.
+# Every generator the runs draw from is derived from the block seed, so a resumed sweep matches an uninterrupted one.
+def run_block(n, p, count, block_seed=None):
+    cell_rng = np.random.default_rng(block_seed) if block_seed is not None else None
+    if cell_rng is not None and count > 0:
+        random.seed(int(cell_rng.integers(2 ** 32)))
+        np.random.seed(int(cell_rng.integers(2 ** 32)))
+
+    block = new_summary(metric_ranges(n))
+    trajectories = []
+    # Dense uint8 adjacency for the matrix engine where the cost model (or the adjacency setting) prefers it
+    density = expected_density(graph_model, n, p, **graph_model_params)
+    dense = use_dense(n, density)
+    if engine == 'networkx' or graph_generator == 'networkx':
+        import networkx as nx  # imported on first use, so workers of the other engines start without it
+
+    # Run experiments for each p value
+    for _ in range(count):
+        if engine == 'deferred':
+            rng = np.random.default_rng(cell_rng)
+            with phase('seeds'):
+                initial_activated = rng.choice(n, initial_activated_count, replace=False)
+        elif graph_model == 'er' and (engine == 'networkx' or graph_generator == 'networkx'):
+            with phase('graph'):
+                G = nx.erdos_renyi_graph(n, p)
+            with phase('seeds'):
+                initial_activated = np.random.choice(G.nodes, initial_activated_count, replace=False)
+        else:
+            rng = np.random.default_rng(cell_rng)
+            with phase('graph'):
+                if graph_model == 'er':
+                    A = erdos_renyi_dense(n, p, rng) if dense else erdos_renyi_csr(n, p, rng)
+                else:
+                    A = sample_model_graph(graph_model, n, p, rng, **graph_model_params)
+                    A = A.toarray().astype(np.uint8) if dense else A
+            with phase('seeds'):
+                initial_activated = rng.choice(n, initial_activated_count, replace=False)
+
+        trajectory = new_trajectory(n, initial_activated) if record_trajectories else None
+        if engine == 'deferred':
+            rounds = deferred_rounds(n, p, initial_activated, k1, k2, sigma, reweaken=False, seed=rng, trajectory=trajectory)
+        elif engine == 'networkx':
+            node_states = {node: sigma if node in initial_activated else 0 for node in G.nodes}
+            rounds = networkx_rounds(G, node_states, k1, k2, sigma, reweaken=False, trajectory=trajectory)
+        else:
+            if graph_model == 'er' and graph_generator == 'networkx':
+                with phase('graph'):
+                    A = graph_to_csr(G).toarray().astype(np.uint8) if dense else graph_to_csr(G)
+            if engine == 'frontier':
+                rounds = frontier_rounds(A, initial_activated, k1, k2, sigma, reweaken=False, trajectory=trajectory)
+            elif dense:
+                rounds = dense_rounds(A, initial_states(n, initial_activated, sigma), k1, k2, sigma, reweaken=False,
+                                      trajectory=trajectory)
+            elif run_threads > 1:
+                rounds = partitioned_rounds(A, initial_states(n, initial_activated, sigma), k1, k2, sigma, reweaken=False,
+                                            trajectory=trajectory, threads=run_threads)
+            else:
+                rounds = sparse_rounds(A, initial_states(n, initial_activated, sigma), k1, k2, sigma, reweaken=False,
+                                       trajectory=trajectory)
+        if record_trajectories:
+            trajectories.append(trajectory)
+
+        (fully_activated, weakly_activated, iteration_count, direct_full_activation_ratio, penultimate_weak_activation_proportion,
+         first_step_weak_count, first_step_full_count, final_step_full_activation_proportion, _,
+         final_activation_occurred) = run_to_convergence(rounds, n, initial_activated_count)
+
+        # Fold the run into the block summary; ratios only count when some node was activated, iterations
+        # only for full activation, and the final-step proportions only when an activation occurred
+        count_run(iteration_count)
+        with phase('summary'):
+            block = add_to_summary(block, {
+                'Average Fully Activated Nodes': [fully_activated],
+                'Average Weakly Activated Nodes': [weakly_activated],
+                'Full Activation Proportion': [fully_activated == n],
+                'Average Iterations for Full Activation': [iteration_count] if fully_activated == n else [],
+                'Average Direct Full Activation Proportion': [direct_full_activation_ratio] if fully_activated > initial_activated_count else [],
+                'Penultimate Weak Activation Proportion': [penultimate_weak_activation_proportion] if final_activation_occurred else [],
+                'First Step Weak Activation Count': [first_step_weak_count],
+                'First Step Full Activation Count': [first_step_full_count],
+                'Final Step Full Activation Proportion': [final_step_full_activation_proportion] if final_activation_occurred else []})
+
+    if record_trajectories and count > 0:
+        with phase('trajectories'):
+            save_trajectories(trajectory_path(trajectory_dir, block_seed), trajectories,
+                              n=n, k1=k1, k2=k2, sigma=sigma, p=p, initial_activated_count=initial_activated_count,
+                              engine=engine, reweaken=False)
+    return block
+
+# Function to turn the summary of an (n, p) cell into its CSV row
+def cell_row(n, p, summary):
+    row = [n, k1, k2, p, summary_runs(summary), sigma] + [accumulator_mean(summary[name]) for name in metric_names]
+    if spread_columns:
+        for name in metric_names:
+            row.extend(accumulator_spread(summary[name]))
+    return row
+
+
+# Run the n-scaling study and write its results (python -m msbp nscaling)
+def main():
+    # The result writer pulls in pandas/pyarrow, which only this process needs
+    from msbp.result_table import open_results, write_result, close_results
+
+    if engine == 'deferred' and graph_model != 'er':
+        raise ValueError(f"The 'deferred' engine samples G(n, p) on the fly and cannot run graph_model {graph_model!r}")
+    if engine == 'networkx' and graph_model != 'er':
+        raise ValueError(f"The 'networkx' engine samples G(n, p) with nx.erdos_renyi_graph and cannot run graph_model {graph_model!r}")
+    cells = [(n, p) for n in n_values for p in p_values]
+    if role == 'worker':
+        # Run chunks leased from the coordinator's queue until it stays empty
+        run_worker(queue_path, {cell_store_key(n, p, chunked=True): (n, p) for n, p in cells}, run_block, seed)
+        return
+
+    # Open the result writer (Parquet dataset partitioned by n, plus the CSV export)
+    writer = open_results(results_path, ['n', 'k1', 'k2', 'p', 'Total Experiments', 'sigma'] + metric_names +
+                          [f'{name} {statistic}' for name in (metric_names if spread_columns else []) for statistic in spread_names],
+                          {'n': 'int64', 'k1': 'int64', 'k2': 'int64', 'Total Experiments': 'int64', 'sigma': 'int64'},
+                          partition_by='n', csv_path=csv_path)
+    workers = []
+    try:
+        if role == 'coordinator' or processes > 1:
+            # Lease the (n, p) grid out in chunks of chunk_size runs, or run them on a local pool, largest cells first
+            # with the cost-aware scheduler; rows are written in grid order as cells complete
+            for _ in range(local_workers if role == 'coordinator' else 0):
+                workers.append(multiprocessing.Process(target=run_with_overrides, args=(__name__, overrides, run_worker, queue_path,
+                                                                                        {cell_store_key(n, p, chunked=True): (n, p) for n, p in cells},
+                                                                                        run_block, seed)))
+                workers[-1].start()
+            run_sweep(cells, run_block, cell_row, lambda row: write_result(writer, row), total_experiments, chunk_size, processes,
+                      store=open_store(store_path) if role != 'coordinator' and store_path is not None else None,
+                      cell_keys=[cell_store_key(n, p, chunked=True) for n, p in cells], seed=seed,
+                      merge=merge_summaries, run_count=summary_runs, work_queue=open_queue(queue_path) if role == 'coordinator' else None,
+                      profile_path=profile_path if profile else None, initializer=apply_overrides, initargs=(__name__, overrides),
+                      **({'cell_cost': cell_cost, 'memory_budget': memory_budget_bytes(memory_budget),
+                          'task_seconds': task_seconds} if schedule_by_cost else {}))
+        else:
+            store = open_store(store_path) if store_path is not None else None
+            started = time.time()
+            runs_done = 0
+            # Iterate over n values, then p values
+            for cell_index, (n, p) in enumerate(cells):
+                key = cell_store_key(n, p)
+                summary = new_summary(metric_ranges(n))
+
+                # Runs already recorded in the result store are merged in (stored by the index of their first run);
+                # only the runs still missing up to total_experiments are simulated, so raising it tops a cell up
+                stored = load_chunks(store, key) if store is not None else {}
+                for start in sorted(stored):
+                    summary = merge_summaries(summary, stored[start])
+                start = summary_runs(summary)
+
+                if start < total_experiments:
+                    # Derive the block's generators from the sweep seed so a resumed sweep matches an uninterrupted one
+                    block_seed = chunk_seed(seed, key, start) if seed is not None else None
+                    if profile:
+                        block, block_profile = profile_call(run_block, n, p, total_experiments - start, block_seed)
+                        write_record(profile_path, profile_record(json.loads(key), block_profile, block_profile['wall']))
+                    else:
+                        block = run_block(n, p, total_experiments - start, block_seed)
+                    summary = merge_summaries(summary, block)
+                    runs_done += total_experiments - start
+                    if store is not None:
+                        save_chunk(store, key, start, block)
+
+                write_result(writer, cell_row(n, p, summary))
+                if profile:
+                    print_progress(cell_index + 1, len(cells), runs_done, started)
+    finally:
+        close_results(writer)
+        # Local workers would otherwise wait out their idle time
+        for worker in workers:
+            worker.terminate()
+            worker.join()
+
+
+if __name__ == '__main__':
+    main()
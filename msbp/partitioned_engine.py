@@ -0,0 +1,68 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import scipy.sparse as sp
+from msbp.sparse_engine import apply_thresholds
+from msbp.trajectory import record_step
+
+# Thread pools of this process by thread count, created on first use and kept for later runs
+thread_pools = {}
+
+
+# Function to get this process's pool of `threads` threads
+def thread_pool(threads):
+    if threads not in thread_pools:
+        thread_pools[threads] = ThreadPoolExecutor(threads, thread_name_prefix='msbp-rows')
+    return thread_pools[threads]
+
+
+# Function to split the rows of a CSR matrix into at most `parts` contiguous blocks with about equal nonzeros.
+# The blocks share A's index and data arrays (only their row pointers are new).
+# Returns [(first row, row past the end, block)].
+def partition_rows(A, parts):
+    n = A.shape[0]
+    targets = np.searchsorted(A.indptr, np.linspace(0, A.nnz, parts + 1)[1:-1])
+    bounds = np.unique(np.concatenate([[0], np.clip(targets, 0, n), [n]]))
+    blocks = []
+    for start, stop in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        # Assigned after construction: the constructor would copy slices that are a small part of their arrays
+        first, last = A.indptr[start], A.indptr[stop]
+        block = sp.csr_matrix((stop - start, A.shape[1]), dtype=A.dtype)
+        block.indptr, block.indices, block.data = A.indptr[start:stop + 1] - first, A.indices[first:last], A.data[first:last]
+        blocks.append((start, stop, block))
+    return blocks
+
+
+# Generator yielding per-step counts (new fully, new weakly, direct full, fully activated, weakly activated) like
+# sparse_rounds, with each step split over `threads` threads (default: one per core) by blocks of CSR rows.
+# Every step runs in two synchronous phases over the shared transmission sums and node_states: all blocks first
+# multiply their rows by the states of the previous step, then each applies the thresholds to its own rows (and
+# counts them). The CSR product and the NumPy kernels release the GIL, so the blocks run in parallel within one
+# process, and the per-step counts are exactly those of sparse_rounds.
+def partitioned_rounds(A, node_states, k1, k2, sigma, reweaken=True, trajectory=None, threads=None):
+    threads = threads or os.cpu_count() or 1
+    pool = thread_pool(threads)
+    blocks = partition_rows(A, threads)
+    transmission_sum = np.empty(A.shape[0], dtype=np.result_type(A.dtype, node_states.dtype))
+
+    def block_sums(block):
+        start, stop, rows = block
+        transmission_sum[start:stop] = rows @ node_states
+
+    def block_update(block):
+        start, stop, _ = block
+        states = node_states[start:stop]
+        fully, weakly, direct = apply_thresholds(transmission_sum[start:stop], states, k1, k2, sigma, reweaken)
+        return fully + start, weakly + start, direct, int(np.count_nonzero(states == sigma)), int(np.count_nonzero(states == 1))
+
+    step = 0
+    while True:
+        list(pool.map(block_sums, blocks))
+        updates = list(pool.map(block_update, blocks))
+        new_fully_activated = np.concatenate([update[0] for update in updates])
+        new_weakly_activated = np.concatenate([update[1] for update in updates])
+        step += 1
+        if trajectory is not None:
+            record_step(trajectory, step, new_fully_activated, new_weakly_activated)
+        yield (len(new_fully_activated), len(new_weakly_activated), sum(update[2] for update in updates),
+               sum(update[3] for update in updates), sum(update[4] for update in updates))
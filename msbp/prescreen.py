@@ -0,0 +1,74 @@
+import numpy as np
+
+# Cell classes: the process certainly stops at the seeds, certainly reaches full activation, or neither
+prescreen_classes = ('none', 'full', 'uncertain')
+# Prediction columns recorded next to the simulated ones
+prescreen_columns = ('Prescreen Class', 'No Spread Probability', 'Full Activation Lower Bound',
+                     'Mean Field Fully Activated Nodes', 'Mean Field Weakly Activated Nodes')
+
+
+# Function to get the probability that the first step activates nobody on G(n, p): every non-seed node
+# sees fewer than min(k1, k2) transmitted from its Bin(s, p) seed neighbors (independent across nodes).
+# The process has then converged, so the whole run is determined (see seed_outcome).
+def no_spread_probability(n, p, k1, k2, sigma, initial_activated_count):
+    from scipy import stats  # imported here: it is slow to load and workers never prescreen
+    threshold = k2 if k1 is None else min(k1, k2)
+    seed_neighbors_below = int(np.ceil(threshold / sigma)) - 1  # most seed neighbors that still stay below it
+    return float(stats.binom.cdf(seed_neighbors_below, initial_activated_count, p) ** (n - initial_activated_count))
+
+
+# Function to get a lower bound on the probability of full activation on G(n, p).
+# Step 1 makes the m non-seed nodes with at least ceil(k2 / sigma) seed neighbors full, m ~ Bin(n - s, q);
+# this only reveals seed edges, so every other node still has Bin(m, p) fresh edges to them and is full after step 2
+# if at least ceil(k2 / sigma) of them exist. Summing over m bounds the probability of full activation within two steps.
+def full_activation_bound(n, p, k2, sigma, initial_activated_count):
+    from scipy import stats
+    needed = int(np.ceil(k2 / sigma))
+    others = n - initial_activated_count
+    q = stats.binom.sf(needed - 1, initial_activated_count, p)
+    m = np.arange(others + 1)
+    second_step = stats.binom.sf(needed - 1, m, p) ** (others - m)
+    return float(min(np.sum(stats.binom.pmf(m, others, q) * second_step), 1.0))
+
+
+# Function to run the mean-field recursion of the expected fully and weakly activated counts: every step, a node
+# that is not full sees sigma * Bin(F, p) + Bin(W, p) from the current F full and W weak nodes (counts rounded)
+# and turns full from k2, or weak from k1 if it was inactive. Returns (fully, weakly, steps) at the fixed point.
+def mean_field_counts(n, p, k1, k2, sigma, initial_activated_count, max_steps=1000):
+    from scipy import stats
+    full, weak = float(initial_activated_count), 0.0
+    for step in range(max_steps):
+        full_neighbors = np.arange(int(round(full)) + 1)
+        full_pmf = stats.binom.pmf(full_neighbors, int(round(full)), p)
+        weak_count = int(round(weak))
+        full_probability = np.sum(full_pmf * stats.binom.sf(k2 - 1 - sigma * full_neighbors, weak_count, p))
+        weak_probability = 0.0 if k1 is None else np.sum(full_pmf * stats.binom.sf(k1 - 1 - sigma * full_neighbors, weak_count, p)) - full_probability
+
+        next_full = full + (n - full) * full_probability
+        next_weak = max(weak * (1 - full_probability) + (n - full - weak) * weak_probability, 0.0)
+        if abs(next_full - full) + abs(next_weak - weak) < 1e-3:  # less than a thousandth of a node per step
+            return next_full, next_weak, step
+        full, weak = next_full, next_weak
+    return full, weak, max_steps
+
+
+# Function to classify a cell: 'none' or 'full' when that outcome has probability at least 1 - tolerance
+def classify_cell(n, p, k1, k2, sigma, initial_activated_count, tolerance=1e-6):
+    if no_spread_probability(n, p, k1, k2, sigma, initial_activated_count) >= 1 - tolerance:
+        return 'none'
+    if full_activation_bound(n, p, k2, sigma, initial_activated_count) >= 1 - tolerance:
+        return 'full'
+    return 'uncertain'
+
+
+# Function to get the single_experiment outcome of a run in which nothing spreads beyond the seeds
+def seed_outcome(n, initial_activated_count):
+    return initial_activated_count, 0, 0, 0, 0, 0, 0, 0, initial_activated_count == n
+
+
+# Function to collect the prescreen predictions of a cell, in prescreen_columns order
+def prescreen_cell(n, p, k1, k2, sigma, initial_activated_count, tolerance=1e-6):
+    fully, weakly, _ = mean_field_counts(n, p, k1, k2, sigma, initial_activated_count)
+    return [classify_cell(n, p, k1, k2, sigma, initial_activated_count, tolerance),
+            no_spread_probability(n, p, k1, k2, sigma, initial_activated_count),
+            full_activation_bound(n, p, k2, sigma, initial_activated_count), fully, weakly]
@@ -0,0 +1,100 @@
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Profile of the chunk running in this process (None when profiling is off, so phase() costs nothing)
+active_profile = None
+# Open phases of the active profile, innermost last: [name, start, seconds spent in nested phases]
+open_phases = []
+
+
+# Function to create an empty profile: wall time per phase, runs, spreading iterations, chunk wall time and
+# the peak memory allocated while the chunk ran
+def new_profile():
+    return {'phases': {}, 'runs': 0, 'iterations': 0, 'chunks': 0, 'wall': 0.0, 'peak_memory': 0}
+
+
+# Context manager adding the wall time of its block to `name` in the active profile. Phases are disjoint: a phase
+# opened inside another (e.g. an engine's 'convergence scan' inside the driver's 'spread') is only counted in the
+# inner one, so the phase times of a chunk add up to at most its wall time.
+@contextmanager
+def phase(name):
+    if active_profile is None:
+        yield
+        return
+    entry = [name, time.perf_counter(), 0.0]
+    open_phases.append(entry)
+    try:
+        yield
+    finally:
+        open_phases.pop()
+        seconds = time.perf_counter() - entry[1]
+        if open_phases:
+            open_phases[-1][2] += seconds
+        active_profile['phases'][name] = active_profile['phases'].get(name, 0.0) + seconds - entry[2]
+
+
+# Function to count one finished run and its spreading iterations in the active profile
+def count_run(iterations):
+    if active_profile is not None:
+        active_profile['runs'] += 1
+        active_profile['iterations'] += iterations
+
+
+# Function to call function(*args) under a fresh active profile; returns (result, profile).
+# peak_memory is the peak of the bytes traced by tracemalloc (Python objects and numpy arrays) above what was
+# allocated when the call started, so a chunk is not charged for memory held by earlier chunks of the same worker.
+def profile_call(function, *args):
+    global active_profile
+    active_profile = new_profile()
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    try:
+        result = function(*args)
+    finally:
+        profile, active_profile = active_profile, None
+        open_phases.clear()
+    profile['wall'] = time.perf_counter() - start
+    profile['chunks'] = 1
+    profile['peak_memory'] = max(tracemalloc.get_traced_memory()[1] - baseline, 0)
+    return result, profile
+
+
+# Function to merge two profiles: times and counts add up, peak memory is the larger chunk peak
+def merge_profiles(a, b):
+    phases = dict(a['phases'])
+    for name, seconds in b['phases'].items():
+        phases[name] = phases.get(name, 0.0) + seconds
+    merged = {name: a[name] + b[name] for name in ('runs', 'iterations', 'chunks', 'wall')}
+    merged.update(phases=phases, peak_memory=max(a['peak_memory'], b['peak_memory']))
+    return merged
+
+
+# Function to turn a cell's merged profile into its JSONL record. wall is the compute time summed over its chunks,
+# elapsed the time from its first submitted chunk to its row; runs_per_second is per worker.
+def profile_record(cell, profile, elapsed):
+    return {'cell': cell, 'runs': profile['runs'], 'chunks': profile['chunks'], 'wall': profile['wall'], 'elapsed': elapsed,
+            'runs_per_second': profile['runs'] / profile['wall'] if profile['wall'] > 0 else None,
+            'iterations_per_run': profile['iterations'] / profile['runs'] if profile['runs'] > 0 else None,
+            'phases': profile['phases'], 'peak_memory': profile['peak_memory']}
+
+
+# Function to append one record to a JSONL file
+def write_record(path, record):
+    with open(path, 'a') as file:
+        file.write(json.dumps(record, default=lambda value: value.item()) + '\n')
+
+
+# Function to print the live progress line of a sweep (overwritten in place on stderr)
+def print_progress(cells_done, cells_total, runs_done, started):
+    elapsed = time.time() - started
+    rate = runs_done / elapsed if elapsed > 0 else 0
+    remaining = elapsed / cells_done * (cells_total - cells_done) if cells_done > 0 else float('nan')
+    eta = time.strftime('%H:%M:%S', time.gmtime(remaining)) if remaining == remaining else '--:--:--'
+    print(f'\rcells {cells_done}/{cells_total}, {runs_done} runs, {rate:.1f} runs/s, ETA {eta}   ',
+          end='' if cells_done < cells_total else '\n', file=sys.stderr, flush=True)
@@ -0,0 +1,57 @@
+import numpy as np
+from msbp.deferred_engine import new_deferred_state, clone_deferred_state, deferred_step
+
+
+# Rare-event estimation of the full activation probability on G(n, p) by multilevel splitting.
+# Runs of the deferred engine are Markov chains in their state (deferred_engine.clone_deferred_state), so a run
+# that got far can be copied and continued with fresh draws. Levels are fully activated counts L1 < ... < Lm = n:
+# `effort` runs start from fresh seed sets and advance until they reach L1 or stop; the fraction that reached it
+# estimates P(L1), and `effort` copies of the runs that reached it, picked uniformly with replacement, go on to L2,
+# and so on. The product of the fractions is an unbiased estimate of P(full activation) (fixed-effort splitting),
+# so independent replications average to it and their spread gives its confidence interval.
+
+# Function to place about `count` levels: geometric in the nodes gained beyond the seeds up to n / 2, then in the
+# nodes still missing, so both the first few activations (ignition) and the last few low-degree nodes, which are
+# where runs usually fail, get finely spaced levels (n is always the last)
+def splitting_levels(initial_activated_count, n, count):
+    rising = initial_activated_count + np.geomspace(1, max(n / 2 - initial_activated_count, 1), count // 2)
+    missing = np.geomspace(n / 2, 1, count - count // 2)[1:]
+    levels = np.unique(np.round(np.concatenate([rising, n - missing, [n]])).astype(int))
+    return [int(level) for level in levels if level > initial_activated_count]
+
+
+# Function to advance a run until its fully activated count reaches `level` (True) or it stops without (False).
+# A run stops when a step changes neither count, as run_to_convergence decides.
+def advance_to_level(state, level, k1, k2, reweaken=True):
+    while state['fully_activated_count'] < level:
+        previous = state['fully_activated_count'], state['weakly_activated_count']
+        deferred_step(state, k1, k2, reweaken)
+        if (state['fully_activated_count'], state['weakly_activated_count']) == previous:
+            return False
+    return True
+
+
+# Function to run one splitting replication: returns (estimate of P(full activation), run segments simulated,
+# the fraction of runs that reached each level, for the levels it got to).
+# Every run draws from the replication's one generator, so a replication seed reproduces it exactly.
+def splitting_estimate(n, p, k1, k2, sigma, initial_activated_count, levels, effort, reweaken=True, seed=None):
+    rng = np.random.default_rng(seed)
+    states = [new_deferred_state(n, p, rng.choice(n, initial_activated_count, replace=False), sigma, rng) for _ in range(effort)]
+    estimate = 1.0
+    segments = 0
+    fractions = []
+    for position, level in enumerate(levels):
+        reached = [state for state in states if advance_to_level(state, level, k1, k2, reweaken)]
+        segments += len(states)
+        fractions.append(len(reached) / len(states))
+        estimate *= fractions[-1]
+        if not reached or position == len(levels) - 1:
+            break
+        # Resample the next level's starting runs; a run's first pick continues it, later picks continue copies
+        picks = rng.integers(len(reached), size=effort)
+        used = set()
+        states = []
+        for pick in picks.tolist():
+            states.append(reached[pick] if pick not in used else clone_deferred_state(reached[pick], rng))
+            used.add(pick)
+    return estimate, segments, fractions
@@ -0,0 +1,45 @@
+import json
+import sqlite3
+import zlib
+import numpy as np
+
+
+# Function to open (or create) the sqlite result store holding every finished chunk or cell
+# (timeout: seconds to wait for another process's write lock)
+def open_store(path, timeout=5.0):
+    connection = sqlite3.connect(path, timeout=timeout)
+    connection.execute('CREATE TABLE IF NOT EXISTS chunks (cell TEXT, chunk INTEGER, results TEXT, PRIMARY KEY (cell, chunk))')
+    connection.commit()
+    return connection
+
+
+# Function to build the canonical key of a cell from its parameters
+# (n, p, k1, k2, sigma, initial_activated_count, seed, engine, engine version, ...).
+# Floats are rounded so that e.g. np.arange's 0.30000000000000004 and 0.3 share a key.
+def cell_key(**params):
+    canonical = {name: float(f'{value:.12g}') if isinstance(value, (float, np.floating)) else value for name, value in params.items()}
+    return json.dumps(canonical, sort_keys=True, default=lambda value: value.item())
+
+
+# Function to derive the seed of one chunk deterministically from the sweep seed, the cell and the chunk index
+def chunk_seed(seed, key, chunk_index):
+    return np.random.SeedSequence([seed, zlib.crc32(key.encode()), chunk_index])
+
+
+# Function to load the stored chunks of a cell as {chunk index: results}
+def load_chunks(connection, key):
+    rows = connection.execute('SELECT chunk, results FROM chunks WHERE cell = ?', (key,))
+    return {chunk_index: json.loads(results) for chunk_index, results in rows}
+
+
+# Function to load one stored chunk (None when it is missing)
+def load_chunk(connection, key, chunk_index):
+    row = connection.execute('SELECT results FROM chunks WHERE cell = ? AND chunk = ?', (key, chunk_index)).fetchone()
+    return json.loads(row[0]) if row is not None else None
+
+
+# Function to record one finished chunk (or a whole cell as chunk 0)
+def save_chunk(connection, key, chunk_index, results):
+    connection.execute('INSERT OR REPLACE INTO chunks VALUES (?, ?, ?)',
+                       (key, chunk_index, json.dumps(results, default=lambda value: value.item())))
+    connection.commit()
@@ -0,0 +1,106 @@
+import csv
+import os
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+
+# Function to open a result writer: rows go to a Parquet dataset at `path` (typed, compressed, optionally
+# hive-partitioned by one column, e.g. k1 or n) and, with `csv_path`, also to a CSV export with the same header.
+# types: {column: pyarrow type name such as 'int64'}; every other column is stored as float64.
+# An existing dataset at `path` is replaced, like a CSV opened with mode='w'. Either path may be None.
+def open_results(path, header, types=None, partition_by=None, csv_path=None, batch_rows=1000):
+    types = types or {}
+    schema = pa.schema([(name, pa.type_for_alias(types.get(name, 'float64'))) for name in header],
+                       metadata={'partition_by': partition_by or ''})
+    if path is not None:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.makedirs(path)
+        pq.write_metadata(schema, os.path.join(path, '_common_metadata'))
+    writer = {'path': path, 'schema': schema, 'batch_rows': batch_rows,
+              'rows': [], 'batches': 0, 'csv_file': None, 'csv_writer': None}
+    if csv_path is not None:
+        writer['csv_file'] = open(csv_path, mode='w', newline='')
+        writer['csv_writer'] = csv.writer(writer['csv_file'])
+        writer['csv_writer'].writerow(header)
+    return writer
+
+
+# Function to write the buffered rows as one more set of Parquet files
+def flush_results(writer):
+    if writer['path'] is None or not writer['rows']:
+        return
+    schema = writer['schema']
+    columns = [pa.array([None if value is None else value.item() if hasattr(value, 'item') else value for value in column], type=field.type)
+               for column, field in zip(zip(*writer['rows']), schema)]
+    table = pa.Table.from_arrays(columns, schema=schema)
+    partitioning = partition_scheme(schema)
+    pq.write_to_dataset(table, writer['path'], partitioning=partitioning,
+                        basename_template=f"part-{writer['batches']:05d}-{{i}}.parquet", compression='zstd')
+    writer['batches'] += 1
+    writer['rows'] = []
+
+
+# Function to add one row; the CSV export is flushed immediately, the Parquet dataset every batch_rows rows
+def write_result(writer, row):
+    if writer['csv_writer'] is not None:
+        writer['csv_writer'].writerow(row)
+        writer['csv_file'].flush()
+    writer['rows'].append(list(row))
+    if len(writer['rows']) >= writer['batch_rows']:
+        flush_results(writer)
+
+
+# Function to write the remaining rows and close the CSV export
+def close_results(writer):
+    flush_results(writer)
+    if writer['csv_file'] is not None:
+        writer['csv_file'].close()
+
+
+# Function to get the hive partitioning of a result schema (None when it is not partitioned)
+def partition_scheme(schema):
+    partition_by = schema.metadata.get(b'partition_by', b'').decode() if schema.metadata else ''
+    return ds.partitioning(pa.schema([schema.field(partition_by)]), flavor='hive') if partition_by else None
+
+
+# Function to load sweep results as a DataFrame, reading only `columns` and the rows matching `filters`
+# (pandas/pyarrow style, e.g. [('k1', 'in', [13, 14, 15]), ('p', '<=', 0.5)]).
+# Parquet datasets are memory-mapped and filters on the partition column skip whole directories;
+# a .csv path falls back to pandas with the same projection and filters. Rows come back ordered by the partition
+# column (missing values first) and in written order within each partition.
+def load_results(path, columns=None, filters=None):
+    if str(path).endswith('.csv'):
+        filters = filters or []
+        usecols = None if columns is None else list(dict.fromkeys(list(columns) + [name for name, _, _ in filters]))
+        data = pd.read_csv(path, usecols=usecols)
+        for name, op, value in filters:
+            column = data[name]
+            if op == 'in':
+                keep = column.isin(value)
+            elif op == 'not in':
+                keep = ~column.isin(value)
+            else:
+                keep = {'==': column.eq, '!=': column.ne, '<': column.lt, '<=': column.le, '>': column.gt, '>=': column.ge}[op](value)
+            data = data[keep]
+        return (data[columns] if columns is not None else data).reset_index(drop=True)
+
+    schema = pq.read_schema(os.path.join(path, '_common_metadata'))
+    dataset = ds.dataset(path, schema=schema, format='parquet', partitioning=partition_scheme(schema),
+                         filesystem=pafs.LocalFileSystem(use_mmap=True))
+    table = dataset.to_table(columns=columns, filter=pq.filters_to_expression(filters) if filters else None)
+    data = table.to_pandas()
+    # Partition directories are scanned in name order (k1=13 before k1=3); sort them numerically
+    partition_by = schema.metadata.get(b'partition_by', b'').decode()
+    if partition_by and partition_by in data.columns:
+        data = data.sort_values(partition_by, kind='stable', na_position='first').reset_index(drop=True)
+    return data
+
+
+# Function to export a Parquet result dataset (or a projection of it) to CSV
+def export_csv(path, csv_path, columns=None, filters=None):
+    load_results(path, columns, filters).to_csv(csv_path, index=False)
@@ -0,0 +1,88 @@
+import numpy as np
+
+# Extra per-metric statistics that can be reported next to the means
+spread_names = ('Variance', 'Q05', 'Median', 'Q95')
+
+
+# Function to create an empty streaming accumulator: count, mean and sum of squared deviations (Welford),
+# min/max, and a fixed histogram of `bins` equal bins over [low, high] for quantiles (values outside the
+# range land in the edge bins). A plain dict, so it pickles and JSON-serializes into the result store.
+def new_accumulator(low=0.0, high=1.0, bins=100):
+    return {'count': 0, 'mean': 0.0, 'm2': 0.0, 'min': np.inf, 'max': -np.inf,
+            'low': low, 'high': high, 'histogram': [0] * bins}
+
+
+# Function to merge two accumulators over the same histogram range (Chan et al. parallel update)
+def merge_accumulators(a, b):
+    count = a['count'] + b['count']
+    if b['count'] == 0:
+        return dict(a)
+    if a['count'] == 0:
+        return dict(b)
+    delta = b['mean'] - a['mean']
+    return {'count': count, 'mean': a['mean'] + delta * b['count'] / count,
+            'm2': a['m2'] + b['m2'] + delta ** 2 * a['count'] * b['count'] / count,
+            'min': min(a['min'], b['min']), 'max': max(a['max'], b['max']), 'low': a['low'], 'high': a['high'],
+            'histogram': [x + y for x, y in zip(a['histogram'], b['histogram'])]}
+
+
+# Function to add a batch of values to an accumulator
+def add_values(accumulator, values):
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return accumulator
+    bins = len(accumulator['histogram'])
+    width = (accumulator['high'] - accumulator['low']) / bins
+    positions = np.clip(np.floor((values - accumulator['low']) / width), 0, bins - 1).astype(np.int64)
+    mean = values.mean()
+    batch = {'count': len(values), 'mean': float(mean), 'm2': float(((values - mean) ** 2).sum()),
+             'min': float(values.min()), 'max': float(values.max()), 'low': accumulator['low'], 'high': accumulator['high'],
+             'histogram': np.bincount(positions, minlength=bins).tolist()}
+    return merge_accumulators(accumulator, batch)
+
+
+# Function to get the mean of an accumulator (0 when it holds no values, like the CSV always reported)
+def accumulator_mean(accumulator):
+    return accumulator['mean'] if accumulator['count'] > 0 else 0
+
+
+# Function to get the sample variance of an accumulator
+def accumulator_variance(accumulator):
+    return accumulator['m2'] / (accumulator['count'] - 1) if accumulator['count'] > 1 else 0
+
+
+# Function to estimate a quantile from the histogram, interpolating linearly inside the bin and
+# clamping to the exact min/max
+def accumulator_quantile(accumulator, q):
+    if accumulator['count'] == 0:
+        return 0
+    histogram = np.asarray(accumulator['histogram'])
+    cumulative = np.cumsum(histogram)
+    target = q * accumulator['count']
+    position = min(int(np.searchsorted(cumulative, target)), len(histogram) - 1)
+    below = cumulative[position] - histogram[position]
+    fraction = (target - below) / histogram[position] if histogram[position] > 0 else 0
+    width = (accumulator['high'] - accumulator['low']) / len(histogram)
+    value = accumulator['low'] + (position + fraction) * width
+    return float(min(max(value, accumulator['min']), accumulator['max']))
+
+
+# Function to get the spread statistics (spread_names order) of an accumulator
+def accumulator_spread(accumulator):
+    return [accumulator_variance(accumulator), accumulator_quantile(accumulator, 0.05),
+            accumulator_quantile(accumulator, 0.5), accumulator_quantile(accumulator, 0.95)]
+
+
+# Function to create an empty summary, one accumulator per metric; ranges: {metric: (low, high, bins)}
+def new_summary(ranges):
+    return {name: new_accumulator(*bounds) for name, bounds in ranges.items()}
+
+
+# Function to add per-metric batches of values to a summary; values: {metric: values}
+def add_to_summary(summary, values):
+    return {name: add_values(accumulator, values.get(name, ())) for name, accumulator in summary.items()}
+
+
+# Function to merge two summaries metric by metric
+def merge_summaries(a, b):
+    return {name: merge_accumulators(a[name], b[name]) for name in a}
@@ -0,0 +1,20 @@
+import importlib
+
+
+# Function to override module-level parameters of a driver module (msbp.sweep, msbp.nscaling, msbp.video).
+# The values are also recorded in the module's `overrides`, which the drivers hand to their worker processes
+# (apply_overrides as pool initializer, run_with_overrides as process target) so workers started with spawn or
+# forkserver, which re-import the module with its defaults, run with the same parameters.
+def apply_overrides(module_name, overrides):
+    module = importlib.import_module(module_name)
+    for name, value in overrides.items():
+        if not hasattr(module, name) or callable(getattr(module, name)):
+            raise AttributeError(f'{module_name} has no parameter {name!r}')
+        setattr(module, name, value)
+    module.overrides = dict(module.overrides, **overrides)
+
+
+# Process target: apply a driver's overrides, then call function(*args)
+def run_with_overrides(module_name, overrides, function, *args):
+    apply_overrides(module_name, overrides)
+    return function(*args)
@@ -0,0 +1,68 @@
+import numpy as np
+import scipy.sparse as sp
+from msbp.trajectory import record_step
+from msbp.profiling import phase
+
+
+# Function to convert a networkx graph into CSR adjacency (rows follow G.nodes order)
+def graph_to_csr(G):
+    n = G.number_of_nodes()
+    index = {node: i for i, node in enumerate(G.nodes)}
+    edges = np.fromiter((index[v] for edge in G.edges for v in edge), dtype=np.int32, count=2 * G.number_of_edges())
+    rows, cols = edges[0::2], edges[1::2]
+    rows, cols = np.concatenate([rows, cols]), np.concatenate([cols, rows])
+    A = sp.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=(n, n))
+    A.sum_duplicates()
+    A.data[:] = 1  # self-loops and multi-edges count once, like G.neighbors
+    return A
+
+
+# Function to build the compact state array: 0 (inactive), 1 (weakly activated), sigma (fully activated)
+def initial_states(n, initial_activated, sigma):
+    node_states = np.zeros(n, dtype=np.int8)
+    node_states[np.asarray(initial_activated, dtype=np.intp)] = sigma
+    return node_states
+
+
+# Function to update activation status with one sparse matrix-vector product per step.
+# With reweaken=True a weak node that still meets k1 is reported again as weakly activated
+# (msbp.sweep semantics); reweaken=False matches msbp.nscaling.
+def spread_activation_sparse(A, node_states, k1, k2, sigma, reweaken=True):
+    # int32 adjacency data makes the product accumulate in int32, so int8 states never overflow
+    return apply_thresholds(A @ node_states, node_states, k1, k2, sigma, reweaken)
+
+
+# Function to apply the activation rules to the transmission sums of one step and update node_states in place;
+# returns (new fully activated nodes, new weakly activated nodes, direct full activations)
+def apply_thresholds(transmission_sum, node_states, k1, k2, sigma, reweaken=True):
+    candidates = node_states != sigma
+
+    fully = candidates & (transmission_sum >= k2)
+    if k1 is not None:
+        weakly = candidates & ~fully & (transmission_sum >= k1)
+        if not reweaken:
+            weakly &= node_states != 1
+    else:
+        weakly = np.zeros_like(fully)
+
+    direct_full_activation = int(np.count_nonzero(fully & (node_states == 0)))
+
+    node_states[fully] = sigma
+    node_states[weakly] = 1
+
+    return np.flatnonzero(fully), np.flatnonzero(weakly), direct_full_activation
+
+
+# Generator yielding per-step counts (new fully, new weakly, direct full, fully activated, weakly activated).
+# With a trajectory (trajectory.new_trajectory) every node's first weak and full step are recorded as well.
+# The two state counts are profiled as the 'convergence scan' phase.
+def sparse_rounds(A, node_states, k1, k2, sigma, reweaken=True, trajectory=None):
+    step = 0
+    while True:
+        new_fully_activated, new_weakly_activated, direct_full_activation = spread_activation_sparse(A, node_states, k1, k2, sigma, reweaken)
+        step += 1
+        if trajectory is not None:
+            record_step(trajectory, step, new_fully_activated, new_weakly_activated)
+        with phase('convergence scan'):
+            counts = int(np.count_nonzero(node_states == sigma)), int(np.count_nonzero(node_states == 1))
+        yield (len(new_fully_activated), len(new_weakly_activated), direct_full_activation) + counts
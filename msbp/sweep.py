@@ -0,0 +1,516 @@
+import numpy as np
+import multiprocessing
+import random
+from msbp.core import networkx_rounds, run_to_convergence
+from msbp.settings import apply_overrides, run_with_overrides
+from msbp.sparse_engine import graph_to_csr, initial_states, sparse_rounds
+from msbp.frontier_engine import frontier_rounds
+from msbp.partitioned_engine import partitioned_rounds
+from msbp.batched_engine import run_batch, run_variants
+from msbp.dense_engine import dense_rounds, run_dense_batch, run_dense_variants, choose_adjacency
+from msbp.er_graph import erdos_renyi_csr, erdos_renyi_dense, nested_erdos_renyi
+from msbp.graph_models import sample_model_graph, expected_density
+from msbp.deferred_engine import deferred_rounds
+from msbp.rare_event import splitting_levels, splitting_estimate
+from msbp.sweep_executor import run_sweep
+from msbp.cost_model import run_cost, memory_budget_bytes
+from msbp.work_queue import open_queue, run_worker
+from msbp.result_store import open_store, cell_key
+from msbp.trajectory import new_trajectory, save_trajectories, trajectory_path
+from msbp.adaptive import confidence_interval, intervals_within_targets
+from msbp.profiling import phase, count_run
+from msbp.prescreen import prescreen_columns, classify_cell, prescreen_cell, seed_outcome
+from msbp.run_statistics import (spread_names, accumulator_mean, accumulator_variance, accumulator_spread, new_summary,
+                            add_to_summary, merge_summaries)
+
+# Parameters
+n = 500
+k2 = 20
+initial_activated_count = 10
+total_experiments = 1000
+sigma = 3
+k1_values = [None] + list(range(3, 20))
+p_values = np.arange(0, 1.02, 0.02)  # Edge probabilities of the grid (increasing for coupled_p); cells already in the result store are not rerun, so extending the grid only costs the new p
+engine = 'sparse'  # 'networkx' (reference dict-based loop), 'sparse' (matrix-vector product, see adjacency), 'frontier' (incremental), 'batched' or 'deferred' (graph-free)
+chunk_size = 50  # Experiments per pool task (advanced together as one batch when engine is 'batched')
+processes = 32  # Number of cores to use
+run_threads = 1  # Threads each 'sparse' CSR run is split over by blocks of rows (partitioned_engine.py), for graphs so large that a single run is the bottleneck; results are identical (keep processes x run_threads near the core count)
+schedule_by_cost = True  # Cost-aware pool scheduling (sweep_executor.run_sweep): most expensive cells first, cheap chunks grouped into tasks of about task_seconds, graph memory of running tasks capped at memory_budget; results are unchanged
+memory_budget = 'auto'  # Bytes the graphs of concurrently running tasks may take together ('auto': 80% of the memory free at the start, None: no cap)
+task_seconds = 2.0  # Target compute time of a task of grouped chunks
+graph_generator = 'csr'  # 'csr' (sample G(n,p) straight into CSR) or 'networkx' (nx.erdos_renyi_graph, converted) for the CSR engines
+graph_model = 'er'  # 'er' (G(n,p)), 'barabasi_albert', 'configuration', 'stochastic_block' or 'edge_list', built straight into CSR (graph_models.py); p sets the expected degree p (n - 1), or the edge retention of an edge list. The 'deferred' and 'networkx' engines and the prescreen need 'er'
+graph_model_params = {}  # Settings of the graph model, e.g. {'path': 'network.txt'} for 'edge_list' (n must be its node count); see graph_models.sample_model_graph
+adjacency = 'auto'  # Graph matrix of the 'sparse' and 'batched' engines and common random numbers: 'sparse' (CSR), 'dense' (uint8, BLAS products) or 'auto' (per cell from n, p and free memory); results are identical
+engine_version = 3  # Bump when simulation semantics (or the stored chunk format) change so stored results are not reused
+seed = 2024  # Sweep seed; every chunk derives its own seed from it (None for unseeded runs)
+store_path = 'parallel2.sqlite'  # Result store of finished chunks; a rerun only computes what is missing (None to disable)
+common_random_numbers = False  # Reuse each sampled graph and seed set across all k1 values (and the k2/sigma grids below) of a p
+crn_k2_values = [k2]  # k2 values simulated side by side in common-random-numbers mode
+crn_sigma_values = [sigma]  # sigma values simulated side by side in common-random-numbers mode
+coupled_p = False  # Nested-p coupled sweep: each run draws one seed set and one graph that grows across the whole p grid (er_graph.nested_erdos_renyi), so curves over p are smooth; one cell per k1 (per sweep with common_random_numbers), G(n,p) only
+rare_event = False  # Estimate every (k1, p) cell's full activation probability by multilevel splitting of deferred G(n, p) runs (rare_event.py), which resolves probabilities far below 1 / total_experiments; rows go to the splitting_ paths, G(n,p) only, no prescreen
+splitting_replications = 20  # Independent splitting replications per cell; their mean is the estimate and their spread its confidence interval
+splitting_level_count = 10  # Levels of the fully activated count per replication (rare_event.splitting_levels), or the list of levels itself (ending in n)
+splitting_effort = 100  # Runs advanced to every level in each replication
+splitting_results_path = 'parallel2_splitting.parquet'  # Columnar results of rare-event mode (None to skip)
+splitting_csv_path = 'parallel2_splitting.csv'  # CSV export of the same rows (None to skip)
+adaptive = False  # Run each cell until the confidence intervals of adaptive_targets are narrow enough, instead of total_experiments runs
+min_experiments = 100  # Runs per cell before the first precision check (and per extra round) in adaptive mode
+max_experiments = 10000  # Cap on runs per cell in adaptive mode
+adaptive_targets = {'Full Activation Proportion': 0.05, 'Average Fully Activated Nodes': 10}  # Metric -> target width of its 95% CI
+spread_columns = True  # Also report the variance and 5%/50%/95% quantiles of every metric
+prescreen = True  # Classify every cell analytically first (prescreen.py) and record its predictions next to the simulated columns
+prescreen_tolerance = 1e-6  # A cell is certain when its outcome has probability at least 1 - prescreen_tolerance
+prescreen_experiments = 100  # Runs of cells certain to fully activate (their step counts still vary); cells where nothing can spread run none
+results_path = 'parallel2.parquet'  # Columnar results (Parquet dataset partitioned by k1) for result_table.load_results (None to skip)
+csv_path = 'parallel2.csv'  # CSV export of the same rows (None to skip)
+record_trajectories = False  # Also store every run's per-node weak/full activation steps, one file per chunk (not for 'batched', common random numbers or coupled_p)
+trajectory_dir = 'trajectories'  # Directory of the stored trajectories (trajectory.load_trajectories / run_outcome replay them)
+role = 'local'  # 'local' (process pool on this machine), 'coordinator' (lease the grid out through queue_path and merge the results) or 'worker'
+queue_path = 'parallel2.queue.sqlite'  # Work queue on a directory every machine can reach; it also stores the finished chunks (store_path is not used)
+local_workers = 0  # Worker processes the coordinator starts on its own machine (more can join with role = 'worker')
+profile = False  # Profile every chunk: one JSONL record per cell (phase times, runs/s, iterations per run, peak memory allocated per chunk) plus a live progress/ETA line
+profile_path = 'parallel2.profile.jsonl'  # Where the profile records are appended
+
+# Parameters set from the command line (msbp.cli --set); worker processes apply them too
+overrides = {}
+
+# Function to get the reported metrics in CSV column order, with the histogram range (low, high, bins) their quantiles are estimated from
+# (a run changes at least one node's state per iteration and each node changes at most twice, so it takes at most 2n iterations)
+def metric_ranges():
+    return {'Average Fully Activated Nodes': (0, n, 100), 'Average Weakly Activated Nodes': (0, n, 100),
+            'Full Activation Proportion': (0, 1, 2), 'Average Iterations for Full Activation': (0, 2 * n, min(2 * n, 1000)),
+            'Average Direct Full Activation Proportion': (0, 1, 100), 'Penultimate Weak Activation Proportion': (0, 1, 100),
+            'First Step Weak Activation Count': (0, n, 100), 'First Step Full Activation Count': (0, n, 100),
+            'Final Step Full Activation Proportion': (0, 1, 100)}
+
+# Function to sample a graph matrix (CSR, or dense uint8 with dense=True; the same graph for the same seed)
+# and its initial activated nodes for the matrix engines
+def sample_graph(p, rng=None, dense=False):
+    if graph_model != 'er':
+        rng = np.random.default_rng(rng)
+        with phase('graph'):
+            A = sample_model_graph(graph_model, n, p, rng, **graph_model_params)
+            A = A.toarray().astype(np.uint8) if dense else A
+        with phase('seeds'):
+            return A, rng.choice(n, initial_activated_count, replace=False)
+    if graph_generator == 'networkx':
+        import networkx as nx  # imported on first use, so workers of the other paths start without it
+        with phase('graph'):
+            G = nx.erdos_renyi_graph(n, p)
+            A = graph_to_csr(G).toarray().astype(np.uint8) if dense else graph_to_csr(G)
+        with phase('seeds'):
+            return A, np.random.choice(G.nodes, initial_activated_count, replace=False)
+    rng = np.random.default_rng(rng)
+    with phase('graph'):
+        A = erdos_renyi_dense(n, p, rng) if dense else erdos_renyi_csr(n, p, rng)
+    with phase('seeds'):
+        return A, rng.choice(n, initial_activated_count, replace=False)
+
+# Function to decide whether a cell's graphs are held as dense matrices (`graphs` of them at once per worker)
+def use_dense(p, graphs=1):
+    if adjacency == 'auto':
+        return choose_adjacency(n, expected_density(graph_model, n, p, **graph_model_params), graphs, processes) == 'dense'
+    return adjacency == 'dense'
+
+# Function to get a cell's prior cost for the scheduler (cost_model.run_cost): (seconds per run, bytes a task holds).
+# Common-random-numbers and coupled runs share one graph across variants; coupled runs keep the sorted pairs of the
+# largest p next to the current level and pay for every level.
+def cell_cost(*cell):
+    generator = graph_generator if graph_model == 'er' else 'csr'
+    if rare_event:
+        seconds, memory = run_cost(n, cell[1], 'deferred')
+        return seconds * splitting_effort * len(rare_event_levels()), memory * splitting_effort
+    if coupled_p:
+        levels = [run_cost(n, p, dense=use_dense(p)) for p in cell[0]]
+        return sum(seconds for seconds, _ in levels), run_cost(n, max(cell[0]))[1] + max(memory for _, memory in levels)
+    p = cell[0] if common_random_numbers else cell[1]
+    density = expected_density(graph_model, n, p, **graph_model_params)
+    if common_random_numbers:
+        return run_cost(n, density, dense=use_dense(p), generator=generator)
+    if engine == 'batched':
+        return run_cost(n, density, engine, use_dense(p, chunk_size), generator, graphs=chunk_size)
+    return run_cost(n, density, engine, engine == 'sparse' and use_dense(p), generator)
+
+# Single experiment function for parallel execution
+# (with a `trajectories` list, the run's per-node activation steps are appended to it;
+#  dense runs the 'sparse' engine on a dense matrix)
+def single_experiment(k1, p, rng=None, trajectories=None, dense=False):
+    if engine == 'networkx':
+        import networkx as nx
+        with phase('graph'):
+            G = nx.erdos_renyi_graph(n, p)
+        with phase('seeds'):
+            initial_activated = np.random.choice(G.nodes, initial_activated_count, replace=False)
+    elif engine == 'deferred':
+        rng = np.random.default_rng(rng)
+        with phase('seeds'):
+            initial_activated = rng.choice(n, initial_activated_count, replace=False)
+    else:
+        A, initial_activated = sample_graph(p, rng, dense and engine == 'sparse')
+
+    trajectory = new_trajectory(n, initial_activated) if trajectories is not None else None
+    if engine == 'networkx':
+        node_states = {node: sigma if node in initial_activated else 0 for node in G.nodes}
+        rounds = networkx_rounds(G, node_states, k1, k2, sigma, trajectory=trajectory)
+    elif engine == 'deferred':
+        rounds = deferred_rounds(n, p, initial_activated, k1, k2, sigma, seed=rng, trajectory=trajectory)
+    elif engine == 'frontier':
+        rounds = frontier_rounds(A, initial_activated, k1, k2, sigma, trajectory=trajectory)
+    elif dense:
+        rounds = dense_rounds(A, initial_states(n, initial_activated, sigma), k1, k2, sigma, trajectory=trajectory)
+    elif run_threads > 1:
+        rounds = partitioned_rounds(A, initial_states(n, initial_activated, sigma), k1, k2, sigma, trajectory=trajectory, threads=run_threads)
+    else:
+        rounds = sparse_rounds(A, initial_states(n, initial_activated, sigma), k1, k2, sigma, trajectory=trajectory)
+
+    outcome = run_to_convergence(rounds, n, initial_activated_count)
+    if trajectories is not None:
+        trajectories.append(trajectory)
+    count_run(outcome[2])
+    return outcome[:9]
+
+# Batched experiment function: runs `count` independent experiments as one state matrix
+def batched_experiments(k1, p, count, rng=None, dense=False):
+    adjacencies = []
+    initial_activated_sets = []
+    for _ in range(count):
+        A, initial_activated = sample_graph(p, rng, dense)
+        adjacencies.append(A)
+        initial_activated_sets.append(initial_activated)
+    with phase('spread'):
+        results = (run_dense_batch if dense else run_batch)(adjacencies, initial_activated_sets, k1, k2, sigma, initial_activated_count)
+    for result in results:
+        count_run(result[2])
+    return results
+
+# Function to seed a chunk: returns its generator and seeds the global ones the networkx paths draw from
+def seed_chunk(chunk_seed):
+    if chunk_seed is None:
+        return None
+    rng = np.random.default_rng(chunk_seed)
+    random.seed(int(rng.integers(2 ** 32)))
+    np.random.seed(int(rng.integers(2 ** 32)))
+    return rng
+
+# Function to fold per-run result tuples into a summary of streaming accumulators, one per reported metric.
+# Ratios only count when positive and iterations only for runs that reached full activation.
+def summarize_results(results):
+    results = np.asarray(results, dtype=float).reshape(-1, 9)
+    full = results[:, 0] == n
+    return add_to_summary(new_summary(metric_ranges()), {
+        'Average Fully Activated Nodes': results[:, 0], 'Average Weakly Activated Nodes': results[:, 1],
+        'Full Activation Proportion': results[:, 8], 'Average Iterations for Full Activation': results[full, 2],
+        'Average Direct Full Activation Proportion': results[results[:, 3] > 0, 3],
+        'Penultimate Weak Activation Proportion': results[results[:, 4] > 0, 4],
+        'First Step Weak Activation Count': results[:, 5], 'First Step Full Activation Count': results[:, 6],
+        'Final Step Full Activation Proportion': results[:, 7]})
+
+# Function to get the number of runs a summary holds
+def summary_runs(summary):
+    return summary['Full Activation Proportion']['count']
+
+# Functions to merge and count the per-variant summaries of common-random-numbers chunks
+def merge_variant_summaries(a, b):
+    return [merge_summaries(x, y) for x, y in zip(a, b)]
+
+def variant_runs(summaries):
+    return summary_runs(summaries[0])
+
+# Chunk function for the sweep executor: runs `count` experiments for a given k1 and p and returns their summary.
+# A chunk seed makes the chunk reproducible.
+def run_chunk(k1, p, count, chunk_seed=None):
+    rng = seed_chunk(chunk_seed)
+    if engine == 'batched':
+        results = batched_experiments(k1, p, count, rng, use_dense(p, count))
+    else:
+        trajectories = [] if record_trajectories else None
+        dense = engine == 'sparse' and use_dense(p)
+        results = [single_experiment(k1, p, rng, trajectories, dense) for _ in range(count)]
+        if record_trajectories:
+            with phase('trajectories'):
+                save_trajectories(trajectory_path(trajectory_dir, chunk_seed), trajectories, n=n, k1=k1, k2=k2, sigma=sigma, p=p,
+                                  initial_activated_count=initial_activated_count, engine=engine, reweaken=True)
+    with phase('summary'):
+        return summarize_results(results)
+
+# Chunk function for common-random-numbers mode: each run samples one graph and initial seed set and
+# simulates every (k1, k2, sigma) variant on it side by side; returns one summary per variant
+def run_variants_chunk(p, variants, count, chunk_seed=None):
+    rng = seed_chunk(chunk_seed)
+    dense = use_dense(p)
+    results = []
+    for _ in range(count):
+        A, initial_activated = sample_graph(p, rng, dense)
+        with phase('spread'):
+            results.append((run_dense_variants if dense else run_variants)(A, initial_activated, variants, initial_activated_count))
+        for result in results[-1]:
+            count_run(result[2])  # every variant counts as a run
+    with phase('summary'):
+        return [summarize_results([run[index] for run in results]) for index in range(len(variants))]
+
+# Chunk function for coupled mode: each run draws one initial seed set and walks the whole p grid on nested graphs
+# (every level adds edges to the previous one) and simulates every (k1, k2, sigma) variant at every level;
+# returns one list of per-variant summaries per p
+def run_coupled_chunk(p_values, variants, count, chunk_seed=None):
+    rng = np.random.default_rng(seed_chunk(chunk_seed))
+    dense = [use_dense(p) for p in p_values]
+    results = [[] for _ in p_values]
+    for _ in range(count):
+        with phase('seeds'):
+            initial_activated = rng.choice(n, initial_activated_count, replace=False)
+        graphs = nested_erdos_renyi(n, p_values, rng, dense)
+        for index in range(len(p_values)):
+            with phase('graph'):
+                A = next(graphs)
+            with phase('spread'):
+                results[index].append((run_dense_variants if dense[index] else run_variants)(A, initial_activated, variants, initial_activated_count))
+            for result in results[index][-1]:
+                count_run(result[2])
+    with phase('summary'):
+        return [[summarize_results([run[variant] for run in level]) for variant in range(len(variants))] for level in results]
+
+# Functions to merge and count the per-p, per-variant summaries of coupled chunks
+def merge_coupled_summaries(a, b):
+    return [merge_variant_summaries(x, y) for x, y in zip(a, b)]
+
+def coupled_runs(summaries):
+    return summary_runs(summaries[0][0])
+
+# Function to run all experiments in parallel for a given k1 and p
+def parallel_experiments(k1, p):
+    with multiprocessing.Pool(processes=processes, initializer=apply_overrides, initargs=(__name__, overrides)) as pool:
+        chunk_counts = [min(chunk_size, total_experiments - start) for start in range(0, total_experiments, chunk_size)]
+        summaries = pool.starmap(run_chunk, [(k1, p, count) for count in chunk_counts])
+    summary = summaries[0]
+    for chunk_summary in summaries[1:]:
+        summary = merge_summaries(summary, chunk_summary)
+    return aggregate_results(k1, p, summary)
+
+# Function to get the levels of rare-event mode (rare_event.splitting_levels, unless given as a list)
+def rare_event_levels():
+    if isinstance(splitting_level_count, int):
+        return splitting_levels(initial_activated_count, n, splitting_level_count)
+    return [int(level) for level in splitting_level_count]
+
+# Function to get the metrics of rare-event cells with the histogram ranges (low, high, bins) of their accumulators
+def splitting_ranges():
+    levels = rare_event_levels()
+    return {'Full Activation Probability': (0, 1, 100), 'Run Segments': (0, len(levels) * splitting_effort, 100),
+            **{f'Level {level} Survival': (0, 1, 100) for level in levels}}
+
+# Chunk function for rare-event mode: runs `count` splitting replications of a (k1, p) cell and returns the summary
+# of their estimates, run segments and fractions of runs that reached each level
+def run_splitting_chunk(k1, p, count, chunk_seed=None):
+    rng = np.random.default_rng(seed_chunk(chunk_seed))
+    levels = rare_event_levels()
+    values = {name: [] for name in splitting_ranges()}
+    for _ in range(count):
+        estimate, segments, fractions = splitting_estimate(n, p, k1, k2, sigma, initial_activated_count, levels, splitting_effort, seed=rng)
+        values['Full Activation Probability'].append(estimate)
+        values['Run Segments'].append(segments)
+        for level, fraction in zip(levels, fractions):
+            values[f'Level {level} Survival'].append(fraction)
+    with phase('summary'):
+        return add_to_summary(new_summary(splitting_ranges()), values)
+
+# Function to get the number of replications a rare-event summary holds
+def splitting_runs(summary):
+    return summary['Full Activation Probability']['count']
+
+# Function to turn the summary of a rare-event cell into a CSV row: the estimate, its 95% CI over the replications
+# and relative standard error, the run segments simulated, and the mean fraction of runs that reached each level
+# given the previous one (empty for levels no replication got to)
+def aggregate_splitting(k1, p, summary):
+    probability = summary['Full Activation Probability']
+    mean = accumulator_mean(probability)
+    low, high = confidence_interval(probability)
+    relative_error = np.sqrt(accumulator_variance(probability) / probability['count']) / mean if mean > 0 else None
+    return ([k1, k2, n, p, probability['count'], sigma, mean, max(low, 0.0), min(high, 1.0), relative_error,
+             probability['count'] * accumulator_mean(summary['Run Segments'])] +
+            [accumulator_mean(summary[name]) if summary[name]['count'] > 0 else None for name in list(splitting_ranges())[2:]])
+
+# Function to pick the accumulators behind the adaptive targets: {metric: (accumulator, is a proportion)}
+def target_metrics(summary):
+    return {name: (summary[name], name == 'Full Activation Proportion') for name in adaptive_targets}
+
+# Adaptive stopping rule: a cell is done once every target metric's confidence interval is narrow enough
+def cell_is_precise(k1, p, summary):
+    return intervals_within_targets(adaptive_targets, target_metrics(summary))
+
+# Adaptive stopping rule for common-random-numbers cells: every variant must be precise
+def variants_are_precise(p, variants, summaries):
+    return all(intervals_within_targets(adaptive_targets, target_metrics(summary)) for summary in summaries)
+
+# Adaptive stopping rule for coupled cells: every variant must be precise at every p
+def coupled_is_precise(p_values, variants, summaries):
+    return all(variants_are_precise(p, variants, level) for p, level in zip(p_values, summaries))
+
+# Function to turn the summary of one (k1, p) cell into a CSV row
+# (variant overrides the (k2, sigma) reported for common-random-numbers cells;
+#  a cell skipped by the prescreen has no summary and reports the seed outcome with 0 experiments)
+def aggregate_results(k1, p, summary, variant=None):
+    cell_k2, cell_sigma = variant if variant is not None else (k2, sigma)
+    runs = summary_runs(summary) if summary is not None else 0
+    if summary is None:
+        summary = summarize_results([seed_outcome(n, initial_activated_count)])
+    row = [k1, cell_k2, n, p, runs, cell_sigma] + [accumulator_mean(summary[name]) for name in metric_ranges()]
+
+    if spread_columns:
+        for name in metric_ranges():
+            row.extend(accumulator_spread(summary[name]))
+
+    # Adaptive mode also records the confidence interval of every target metric
+    if adaptive:
+        for name, (accumulator, proportion) in target_metrics(summary).items():
+            row.extend(confidence_interval(accumulator, proportion))
+
+    # The predictions are for G(n, p); other graph models leave them empty
+    if prescreen:
+        row.extend(prescreen_cell(n, p, k1, cell_k2, cell_sigma, initial_activated_count, prescreen_tolerance) if graph_model == 'er' else
+                   ['uncertain'] + [None] * (len(prescreen_columns) - 1))
+    return row
+
+# Function to aggregate a common-random-numbers cell into one CSV row per variant
+def aggregate_variants(p, variants, summaries):
+    return [aggregate_results(k1, p, summary, (variant_k2, variant_sigma))
+            for summary, (k1, variant_k2, variant_sigma) in zip(summaries, variants)]
+
+# Function to aggregate a coupled cell into one CSV row per p and variant (in p order)
+def aggregate_coupled(p_values, variants, summaries):
+    return [row for p, level in zip(p_values, summaries) for row in aggregate_variants(p, variants, level)]
+
+# Function to get the graph model fields of the store keys (none for G(n, p), so its stored results stay valid)
+def model_key():
+    return {} if graph_model == 'er' else {'graph_model': graph_model, 'graph_model_params': graph_model_params}
+
+# Function to lay out the sweep: (cells, their store keys, chunk function) of the k1 x p grid,
+# or of the p grid when every k1/k2/sigma variant shares its graphs (common random numbers),
+# or of the k1 values (one variant set) when every run spans the whole p grid (coupled);
+# rare-event cells are the k1 x p grid with one splitting replication per chunk
+def sweep_grid():
+    if rare_event:
+        cells = [(k1, p) for k1 in k1_values for p in p_values]
+        cell_keys = [cell_key(n=n, p=p, k1=k1, k2=k2, sigma=sigma, initial_activated_count=initial_activated_count, seed=seed,
+                              engine='splitting', engine_version=engine_version, levels=rare_event_levels(), effort=splitting_effort)
+                     for k1, p in cells]
+        return cells, cell_keys, run_splitting_chunk
+    if coupled_p:
+        variant_sets = ([tuple((k1, variant_k2, variant_sigma) for variant_k2 in crn_k2_values for variant_sigma in crn_sigma_values
+                               for k1 in k1_values)] if common_random_numbers else [((k1, k2, sigma),) for k1 in k1_values])
+        p_grid = tuple(float(f'{p:.12g}') for p in p_values)
+        cells = [(p_grid, variants) for variants in variant_sets]
+        cell_keys = [cell_key(n=n, p_values=p_grid, variants=variants, initial_activated_count=initial_activated_count, seed=seed,
+                              engine='coupled', engine_version=engine_version, chunk_size=chunk_size)
+                     for _, variants in cells]
+        return cells, cell_keys, run_coupled_chunk
+    if common_random_numbers:
+        variants = tuple((k1, variant_k2, variant_sigma) for variant_k2 in crn_k2_values for variant_sigma in crn_sigma_values for k1 in k1_values)
+        cells = [(p, variants) for p in p_values]
+        cell_keys = [cell_key(n=n, p=p, variants=variants, initial_activated_count=initial_activated_count, seed=seed,
+                              engine='crn', engine_version=engine_version, graph_generator=graph_generator, chunk_size=chunk_size, **model_key())
+                     for p, _ in cells]
+        return cells, cell_keys, run_variants_chunk
+    cells = [(k1, p) for k1 in k1_values for p in p_values]
+    cell_keys = [cell_key(n=n, p=p, k1=k1, k2=k2, sigma=sigma, initial_activated_count=initial_activated_count, seed=seed,
+                          engine=engine, engine_version=engine_version, graph_generator=graph_generator, chunk_size=chunk_size, **model_key())
+                 for k1, p in cells]
+    return cells, cell_keys, run_chunk
+
+# Run the sweep and write its results (python -m msbp sweep)
+def main():
+    # The result writer pulls in pandas/pyarrow, which only this process needs
+    from msbp.result_table import open_results, write_result, close_results
+
+    if engine == 'deferred' and graph_model != 'er':
+        raise ValueError(f"The 'deferred' engine samples G(n, p) on the fly and cannot run graph_model {graph_model!r}")
+    if engine == 'networkx' and graph_model != 'er':
+        raise ValueError(f"The 'networkx' engine samples G(n, p) with nx.erdos_renyi_graph and cannot run graph_model {graph_model!r}")
+    if coupled_p and graph_model != 'er':
+        raise ValueError(f'Coupled sweeps grow G(n, p) graphs and cannot run graph_model {graph_model!r}')
+    if rare_event and (graph_model != 'er' or coupled_p or common_random_numbers):
+        raise ValueError('Rare-event mode splits deferred G(n, p) runs; it cannot be combined with another graph_model, '
+                         'coupled_p or common_random_numbers')
+    cells, cell_keys, chunk_function = sweep_grid()
+    if role == 'worker':
+        # Run chunks leased from the coordinator's queue until it stays empty
+        run_worker(queue_path, dict(zip(cell_keys, cells)), chunk_function, seed)
+        return
+
+    if rare_event:
+        header = (['k1', 'k2', 'n', 'p', 'Replications', 'sigma', 'Full Activation Probability', 'Full Activation Probability CI Low',
+                   'Full Activation Probability CI High', 'Relative Standard Error', 'Run Segments'] + list(splitting_ranges())[2:])
+        writer = open_results(splitting_results_path, header, {'k1': 'int64', 'k2': 'int64', 'n': 'int64', 'Replications': 'int64', 'sigma': 'int64'},
+                              partition_by='k1', csv_path=splitting_csv_path)
+    else:
+        header = (['k1', 'k2', 'n', 'p', 'Total Experiments', 'sigma'] + list(metric_ranges()) +
+                  [f'{name} {statistic}' for name in (metric_ranges() if spread_columns else []) for statistic in spread_names] +
+                  [f'{name} CI {bound}' for name in (adaptive_targets if adaptive else []) for bound in ('Low', 'High')] +
+                  (list(prescreen_columns) if prescreen else []))
+        writer = open_results(results_path, header, {'k1': 'int64', 'k2': 'int64', 'n': 'int64', 'Total Experiments': 'int64', 'sigma': 'int64',
+                                                     'Prescreen Class': 'string'},
+                              partition_by='k1', csv_path=csv_path)
+    workers = []
+    try:
+        def write_row(result):
+            write_result(writer, result)
+            print(f"k1: {result[0]}, p: {result[3]:.2f}, Result: {result}")
+
+        def write_rows(rows):
+            for row in rows:
+                write_row(row)
+
+        # One pool for the whole grid (or, as coordinator, the workers of the queue); each row is written as soon as its cell completes
+        store = open_store(store_path) if store_path is not None else None
+        work_queue = open_queue(queue_path) if role == 'coordinator' else None
+        for _ in range(local_workers if role == 'coordinator' else 0):
+            workers.append(multiprocessing.Process(target=run_with_overrides, args=(__name__, overrides, run_worker, queue_path,
+                                                                                    dict(zip(cell_keys, cells)), chunk_function, seed)))
+            workers[-1].start()
+
+        # In adaptive mode every cell starts with min_experiments runs and grows until precise or max_experiments
+        experiments = min_experiments if adaptive else total_experiments
+        # Cost-aware scheduling orders and groups the pool's tasks (a coordinator only orders its leases)
+        scheduling = {'cell_cost': cell_cost, 'memory_budget': memory_budget_bytes(memory_budget),
+                      'task_seconds': task_seconds} if schedule_by_cost else {}
+        if rare_event:
+            # Every chunk is one splitting replication
+            run_sweep(cells, chunk_function, aggregate_splitting, write_row, splitting_replications, 1, processes,
+                      store=store, cell_keys=cell_keys, seed=seed, merge=merge_summaries, run_count=splitting_runs, work_queue=work_queue,
+                      profile_path=profile_path if profile else None, initializer=apply_overrides, initargs=(__name__, overrides),
+                      **scheduling)
+        elif coupled_p:
+            run_sweep(cells, chunk_function, aggregate_coupled, write_rows, experiments, chunk_size, processes,
+                      store=store, cell_keys=cell_keys, seed=seed, is_precise=coupled_is_precise if adaptive else None,
+                      max_experiments=max_experiments, merge=merge_coupled_summaries, run_count=coupled_runs, work_queue=work_queue,
+                      profile_path=profile_path if profile else None, initializer=apply_overrides, initargs=(__name__, overrides),
+                      **scheduling)
+        elif common_random_numbers:
+            run_sweep(cells, chunk_function, aggregate_variants, write_rows, experiments, chunk_size, processes,
+                      store=store, cell_keys=cell_keys, seed=seed, is_precise=variants_are_precise if adaptive else None,
+                      max_experiments=max_experiments, merge=merge_variant_summaries, run_count=variant_runs, work_queue=work_queue,
+                      profile_path=profile_path if profile else None, initializer=apply_overrides, initargs=(__name__, overrides),
+                      **scheduling)
+        else:
+            # Prescreened cells: nothing can spread -> not simulated, certain full activation -> prescreen_experiments runs
+            # (common-random-numbers cells share their graphs across variants and are always simulated in full)
+            cell_experiments = None
+            if prescreen and graph_model == 'er':
+                cell_classes = [classify_cell(n, p, k1, k2, sigma, initial_activated_count, prescreen_tolerance) for k1, p in cells]
+                cell_experiments = [{'none': 0, 'full': prescreen_experiments}.get(cell_class) for cell_class in cell_classes]
+            run_sweep(cells, chunk_function, aggregate_results, write_row, experiments, chunk_size, processes,
+                      store=store, cell_keys=cell_keys, seed=seed, is_precise=cell_is_precise if adaptive else None,
+                      max_experiments=max_experiments, merge=merge_summaries, run_count=summary_runs, cell_experiments=cell_experiments,
+                      work_queue=work_queue, profile_path=profile_path if profile else None,
+                      initializer=apply_overrides, initargs=(__name__, overrides), **scheduling)
+    finally:
+        close_results(writer)
+        # Local workers would otherwise wait out their idle time
+        for worker in workers:
+            worker.terminate()
+            worker.join()
+
+
+if __name__ == '__main__':
+    main()
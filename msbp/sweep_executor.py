@@ -0,0 +1,219 @@
+import collections
+import functools
+import json
+import multiprocessing
+import operator
+import queue
+import time
+from contextlib import nullcontext
+from msbp.result_store import chunk_seed, load_chunks, save_chunk
+from msbp.work_queue import post_lease, collect_leases
+from msbp.profiling import new_profile, merge_profiles, profile_call, profile_record, write_record, print_progress
+from msbp.cost_model import new_runtime_model, record_runtime, expected_seconds
+
+
+# Worker wrapper: runs a task of consecutive chunks of one cell, each with its own count and seed, and returns them
+# tagged with the cell and chunk indices, plus the task's compute time (when profiling, every chunk also gets its
+# profile; only the first chunk carries the wall-clock start, and all carry the time the task finished)
+def run_task(task):
+    index, chunks, run_chunk, cell, profile = task
+    start = time.perf_counter()
+    outcomes = []
+    for position, (chunk_index, count, seed) in enumerate(chunks):
+        if not profile:
+            outcomes.append((chunk_index, run_chunk(*cell, count, seed), None))
+            continue
+        started = time.time()
+        results, chunk_profile = profile_call(run_chunk, *cell, count, seed)
+        chunk_profile['started'] = started if position == 0 else None
+        outcomes.append((chunk_index, results, chunk_profile))
+    finished = time.time()
+    for _, _, chunk_profile in outcomes:
+        if chunk_profile is not None:
+            chunk_profile['finished'] = finished
+    return index, outcomes, time.perf_counter() - start
+
+
+# Function to run a whole parameter grid on one persistent worker pool.
+# Every cell is split into chunks of `chunk_size` experiments and chunks from many cells are in flight at once;
+# results are collected per cell as they arrive and each cell is aggregated as soon as its last chunk lands.
+# Rows are handed to `write_row` in grid order, without waiting for later cells.
+#   run_chunk(*cell, count, seed) -> partial result of `count` runs (must be a picklable top-level function)
+#   merge(a, b) -> partial result of both; run_count(partial) -> number of runs it holds
+#     (defaults: per-run result lists, concatenated; pass e.g. run_statistics.merge_summaries for compact summaries)
+#   aggregate(*cell, merged) -> output row
+# Chunks are merged in chunk order, so the merged result does not depend on the order they arrive in.
+# With a result store (and one key per cell) finished chunks are recorded as they arrive and skipped on a
+# rerun; with a sweep seed every chunk gets a seed derived from (seed, cell key, chunk index), so a resumed
+# sweep reproduces an uninterrupted one exactly.
+# Adaptive mode: with `is_precise(*cell, merged)` every cell first runs `total_experiments` experiments and then
+# keeps adding rounds of chunks until is_precise returns True or `max_experiments` is reached.
+# `cell_experiments` optionally caps the runs of individual cells (None entries keep the sweep's limit); a cell
+# capped at 0 runs nothing and is aggregated with merged=None.
+# Cost-aware scheduling: with `cell_cost(*cell)` -> (prior seconds per run, bytes a task of the cell holds; see
+# cost_model.run_cost) chunks are no longer all queued in grid order. At most `processes` tasks run at once, the
+# cell with the most expected work left goes first, and a task takes as many of its cell's chunks as fit in
+# `task_seconds` (fewer towards the end of the sweep, so the last tasks stay short). Tasks whose bytes would push
+# the running tasks past `memory_budget` wait for others to finish, while cheaper cells fill the free workers (a
+# task always starts when nothing runs). Expected seconds come from cost_model's runtime model, which learns from
+# every finished task. The chunks themselves are unchanged, so the results are the same as without the scheduler.
+# Distributed mode: with a work queue (work_queue.open_queue) the chunks are posted as leases instead of going to a
+# local pool, and work_queue.run_worker processes on any machine run them; the queue's chunk table is the store.
+# Leases are posted all at once (most expensive cells first when cell_cost is given; workers claim them in order).
+# Profiling: with a `profile_path` every chunk runs under profiling.profile_call, one JSONL record per cell (phase
+# times, runs per second, iterations per run, peak memory, time waiting in the queue and for collection) is appended
+# to it as the cell completes, and a progress/ETA line is kept up to date on stderr.
+# `initializer(*initargs)` runs in every pool worker first (e.g. settings.apply_overrides, so workers started with
+# spawn see the same parameters as this process).
+def run_sweep(cells, run_chunk, aggregate, write_row, total_experiments, chunk_size=50, processes=32,
+              store=None, cell_keys=None, seed=None, is_precise=None, max_experiments=None, merge=operator.add, run_count=len,
+              cell_experiments=None, work_queue=None, poll_seconds=0.5, profile_path=None, initializer=None, initargs=(),
+              cell_cost=None, memory_budget=None, task_seconds=2.0):
+    cells = list(cells)
+    if work_queue is not None:
+        store = work_queue
+    limit = max_experiments if is_precise is not None and max_experiments is not None else total_experiments
+    limits = [limit if cell_experiments is None or cell_experiments[index] is None else min(cell_experiments[index], limit)
+              for index in range(len(cells))]
+    costs = [cell_cost(*cell) for cell in cells] if cell_cost is not None else None
+
+    accumulators = {index: {} for index in range(len(cells))}
+    stored = {index: load_chunks(store, cell_keys[index]) if store is not None else {} for index in range(len(cells))}
+    planned = {index: 0 for index in range(len(cells))}  # runs scheduled so far per cell
+    pending = {index: collections.deque() for index in range(len(cells))}  # (chunk index, count) not handed out yet
+    pending_runs = {index: 0 for index in range(len(cells))}
+    finished_rows = {}
+    arrived = queue.Queue()
+    posted = {}  # (cell key, chunk index) -> cell index of the chunks leased out through the work queue
+    in_flight = 0  # tasks (or leases) handed out and not collected yet
+    in_flight_memory = 0
+    next_index = 0
+    runtimes = new_runtime_model()
+    profiles = {index: new_profile() for index in range(len(cells))}
+    submitted = {}  # (cell index, chunk index) -> wall-clock time the chunk (or the task it starts) was handed out
+    cell_started = {}
+    started = time.time()
+    runs_done = 0
+
+    def schedule(index, runs):
+        # Plan chunks up to `runs` experiments; stored chunks are folded in directly, the rest wait for dispatch
+        while planned[index] < min(runs, limits[index]):
+            chunk_index = planned[index] // chunk_size
+            count = min(chunk_size, limits[index] - planned[index])
+            planned[index] += count
+            if chunk_index in stored[index] and run_count(stored[index][chunk_index]) == count:
+                accumulators[index][chunk_index] = stored[index][chunk_index]
+                continue
+            pending[index].append((chunk_index, count))
+            pending_runs[index] += count
+
+    def dispatch(pool):
+        # Hand pending chunks out: all of them in grid order, or with a cost model task by task as described above
+        nonlocal in_flight, in_flight_memory
+        waiting = [index for index in pending if pending[index]]
+        if costs is not None:
+            work = {index: expected_seconds(runtimes, index, costs[index][0]) * pending_runs[index] for index in waiting}
+            waiting.sort(key=lambda index: -work[index])
+        for index in waiting:
+            while pending[index]:
+                if costs is not None and work_queue is None:
+                    if in_flight >= processes:
+                        return
+                    if in_flight > 0 and memory_budget is not None and in_flight_memory + costs[index][1] > memory_budget:
+                        break
+                chunks = [pending[index].popleft()]
+                if costs is not None and work_queue is None:
+                    # Group chunks up to task_seconds, and to an even share of the work left so the tail stays balanced
+                    rate = expected_seconds(runtimes, index, costs[index][0])
+                    budget = min(task_seconds, sum(work.values()) / processes)
+                    while pending[index] and rate * (sum(count for _, count in chunks) + pending[index][0][1]) <= budget:
+                        chunks.append(pending[index].popleft())
+                    in_flight_memory += costs[index][1]
+                pending_runs[index] -= sum(count for _, count in chunks)
+                submitted[index, chunks[0][0]] = time.time()
+                cell_started.setdefault(index, submitted[index, chunks[0][0]])
+                in_flight += 1
+                if work_queue is not None:
+                    post_lease(work_queue, cell_keys[index], *chunks[0])
+                    posted[cell_keys[index], chunks[0][0]] = index
+                    continue
+                tasks = [(chunk_index, count, chunk_seed(seed, cell_keys[index], chunk_index) if seed is not None else None)
+                         for chunk_index, count in chunks]
+                pool.apply_async(run_task, ((index, tasks, run_chunk, cells[index], profile_path is not None),),
+                                 callback=arrived.put, error_callback=arrived.put)
+
+    def arrive(index, chunk_index, results, chunk_profile, task_start):
+        # Record one finished chunk (and its profile) and fold its cell
+        nonlocal runs_done
+        accumulators[index][chunk_index] = results
+        if chunk_profile is not None:
+            # Time before the task started (queue wait and task transfer) and after it finished until it is folded here
+            # (result transfer plus any backlog of this process, which then is the bottleneck)
+            phases = chunk_profile['phases']
+            chunk_started = chunk_profile.pop('started')
+            if chunk_started is not None:
+                phases['queue wait'] = phases.get('queue wait', 0.0) + chunk_started - submitted.pop((index, task_start))
+            phases['result wait'] = phases.get('result wait', 0.0) + time.time() - chunk_profile.pop('finished')
+            profiles[index] = merge_profiles(profiles[index], chunk_profile)
+        runs_done += run_count(results)
+        fold(index)
+
+    def fold(index):
+        nonlocal next_index
+        chunks = accumulators[index]
+        if sum(run_count(results) for results in chunks.values()) == planned[index]:
+            results = functools.reduce(merge, [chunks[chunk_index] for chunk_index in sorted(chunks)]) if chunks else None
+            if is_precise is not None and planned[index] < limits[index] and not is_precise(*cells[index], results):
+                # Not precise enough yet: add another round of runs of the same size
+                schedule(index, planned[index] + total_experiments)
+                return fold(index)
+            aggregate_start = time.perf_counter()
+            finished_rows[index] = aggregate(*cells[index], results)
+            del accumulators[index]
+            if profile_path is not None:
+                profile = profiles.pop(index)
+                profile['phases']['aggregate'] = time.perf_counter() - aggregate_start
+                cell = json.loads(cell_keys[index]) if cell_keys is not None else list(cells[index])
+                # Cells never submitted (prescreened or already stored) took no time
+                now = time.time()
+                write_record(profile_path, profile_record(cell, profile, now - cell_started[index] if index in cell_started else 0.0))
+                print_progress(len(cells) - len(accumulators), len(cells), runs_done, started)
+        while next_index in finished_rows:
+            write_row(finished_rows.pop(next_index))
+            next_index += 1
+
+    with multiprocessing.Pool(processes=processes, initializer=initializer, initargs=initargs) if work_queue is None else nullcontext() as pool:
+        for index in range(len(cells)):
+            schedule(index, total_experiments)
+        for index in range(len(cells)):
+            fold(index)
+        dispatch(pool)
+
+        while in_flight > 0:
+            if work_queue is not None:
+                # Workers store their chunks themselves; poll the queue for the ones that finished
+                finished = collect_leases(work_queue, posted)
+                if not finished:
+                    time.sleep(poll_seconds)
+                for key, chunk_index, results, chunk_profile in finished:
+                    in_flight -= 1
+                    index = posted.pop((key, chunk_index))
+                    if costs is not None and chunk_profile is not None:
+                        record_runtime(runtimes, index, costs[index][0], run_count(results), chunk_profile['wall'])
+                    arrive(index, chunk_index, results, chunk_profile, chunk_index)
+                dispatch(pool)
+                continue
+
+            outcome = arrived.get()
+            in_flight -= 1
+            if isinstance(outcome, BaseException):
+                raise outcome
+            index, outcomes, seconds = outcome
+            if costs is not None:
+                in_flight_memory -= costs[index][1]
+                record_runtime(runtimes, index, costs[index][0], sum(run_count(results) for _, results, _ in outcomes), seconds)
+            for chunk_index, results, chunk_profile in outcomes:
+                if store is not None:
+                    save_chunk(store, cell_keys[index], chunk_index, results)
+                arrive(index, chunk_index, results, chunk_profile, outcomes[0][0])
+            dispatch(pool)
@@ -0,0 +1,104 @@
+import json
+import os
+import uuid
+import numpy as np
+
+
+# Function to start the trajectory of one run: the step at which every node became weak and the step at which
+# it became full (-1 for never; the initial activated nodes are full at step 0). Steps fit in int16 for n < 32767.
+def new_trajectory(n, initial_activated):
+    dtype = np.int16 if n < np.iinfo(np.int16).max else np.int32
+    weak_step = np.full(n, -1, dtype=dtype)
+    full_step = np.full(n, -1, dtype=dtype)
+    full_step[np.asarray(initial_activated, dtype=np.intp)] = 0
+    return weak_step, full_step
+
+
+# Function to record one spreading step: nodes reported full or weak at `step` keep their first activation step
+# (with reweaken, already weak nodes are reported again and are left alone)
+def record_step(trajectory, step, new_full, new_weak):
+    weak_step, full_step = trajectory
+    new_full = np.asarray(new_full, dtype=np.intp)
+    new_weak = np.asarray(new_weak, dtype=np.intp)
+    full_step[new_full[full_step[new_full] < 0]] = step
+    weak_step[new_weak[weak_step[new_weak] < 0]] = step
+
+
+# Function to rebuild the per-step counts the engines yield from a trajectory alone:
+# one row (new fully, new weakly, direct full, fully activated, weakly activated) per step, up to and including
+# the first step without any change. reweaken selects msbp.sweep (True) or msbp.nscaling (False) reporting.
+def trajectory_steps(trajectory, reweaken=True):
+    weak_step, full_step = (np.asarray(steps, dtype=np.int64) for steps in trajectory)
+    length = max(int(weak_step.max(initial=0)), int(full_step.max(initial=0))) + 2
+    new_full = np.bincount(full_step[full_step > 0], minlength=length)
+    new_weak = np.bincount(weak_step[weak_step > 0], minlength=length)
+    weak_to_full = np.bincount(full_step[(weak_step >= 0) & (full_step > 0)], minlength=length)
+    fully_count = np.cumsum(np.bincount(full_step[full_step >= 0], minlength=length))
+    weakly_count = np.cumsum(new_weak - weak_to_full)
+
+    # Weak nodes that stay weak still meet k1, so with reweaken they are reported again every step
+    reported_weak = new_weak[1:] + (weakly_count[:-1] - weak_to_full[1:] if reweaken else 0)
+    return np.column_stack([new_full[1:], reported_weak, new_full[1:] - weak_to_full[1:], fully_count[1:], weakly_count[1:]])
+
+
+# Function to get the node states (0, 1 or sigma) of a trajectory after `step` steps
+def states_at(trajectory, step, sigma):
+    weak_step, full_step = trajectory
+    node_states = np.where((weak_step >= 0) & (weak_step <= step), 1, 0).astype(np.int8)
+    node_states[(full_step >= 0) & (full_step <= step)] = sigma
+    return node_states
+
+
+# Generator replaying a stored trajectory as an engine (per-step counts, repeating the final step forever),
+# so the driver loops can consume stored runs without re-simulating
+def replay_rounds(trajectory, reweaken=True):
+    steps = trajectory_steps(trajectory, reweaken)
+    for row in steps:
+        yield tuple(int(value) for value in row)
+    while True:
+        yield tuple(int(value) for value in steps[-1])
+
+
+# Function to recompute the per-run outcome of the driver loops from a trajectory alone, as in single_experiment:
+# (fully, weakly, iterations, direct full ratio, penultimate weak proportion, first step weak, first step full,
+#  final step full proportion, full activation, whether any step reported an activation)
+def run_outcome(trajectory, reweaken=True):
+    n = len(trajectory[1])
+    initial_activated_count = int(np.count_nonzero(trajectory[1] == 0))
+    steps = trajectory_steps(trajectory, reweaken)
+
+    penultimate_weak_activation_proportion = 0
+    final_step_full_activation_proportion = 0
+    final_activation_occurred = False
+    for index, (new_fully_activated_count, new_weakly_activated_count, _, _, _) in enumerate(steps):
+        if new_fully_activated_count > 0 or new_weakly_activated_count > 0:
+            final_activation_occurred = True
+            penultimate_weak_activation_proportion = (steps[index - 1][4] if index > 0 else 0) / n
+            final_step_full_activation_proportion = new_fully_activated_count / n
+
+    fully_activated = int(steps[-1][3])
+    direct_full_activation_count = int(steps[:, 2].sum())
+    direct_full_activation_ratio = direct_full_activation_count / (fully_activated - initial_activated_count) if fully_activated > initial_activated_count else 0
+    return (fully_activated, int(steps[-1][4]), len(steps) - 1, direct_full_activation_ratio, penultimate_weak_activation_proportion,
+            int(steps[0][1]), int(steps[0][0]), final_step_full_activation_proportion, fully_activated == n, final_activation_occurred)
+
+
+# Function to write a batch of trajectories (one row per run) and their parameters to one compressed file
+def save_trajectories(path, trajectories, **params):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    np.savez_compressed(path, weak_step=np.stack([weak_step for weak_step, _ in trajectories]),
+                        full_step=np.stack([full_step for _, full_step in trajectories]),
+                        params=json.dumps(params, default=lambda value: value.item()))
+
+
+# Function to load a batch of trajectories: (list of (weak_step, full_step), parameters)
+def load_trajectories(path):
+    with np.load(path) as batch:
+        return list(zip(batch['weak_step'], batch['full_step'])), json.loads(str(batch['params']))
+
+
+# Function to pick the file of a chunk's trajectories: named after the chunk seed (sweep seed, cell key hash,
+# chunk index), so a rerun of the same chunk writes the same file; unseeded chunks get a random name
+def trajectory_path(directory, chunk_seed=None):
+    name = '-'.join(str(value) for value in chunk_seed.entropy) if chunk_seed is not None else uuid.uuid4().hex
+    return os.path.join(directory, f'{name}.npz')
@@ -0,0 +1,246 @@
+import multiprocessing
+import os
+import subprocess
+import numpy as np
+from msbp.core import spread_activation
+from msbp.er_graph import erdos_renyi_csr
+from msbp.sparse_engine import initial_states, spread_activation_sparse
+from msbp.trajectory import load_trajectories, states_at, trajectory_steps
+from msbp.settings import apply_overrides
+
+# Parameters
+n = 1000  # Number of nodes
+k2 = 10  # Total transmission required for full activation
+initial_activated_count = 10  # Number of initially activated nodes
+sigma = 3  # Transmission value for fully activated nodes
+p = 0.2  # Edge creation probability
+k1 = 4  # Transmission required for partial activation
+renderer = 'incremental'  # 'incremental' (edges rasterized once, frames only recolor nodes and update the text) or 'networkx' (nx.draw of the whole graph per frame)
+render_processes = 1  # Incremental renderer: >1 renders contiguous chunks of frames in parallel processes and joins them
+edge_chunk_size = 20000  # Edges rasterized per vectorized batch (rasterizing stops once a batch covers no new pixel)
+fps = 0.5  # Frames per second of the video
+dpi = 100  # Resolution of the 8x8 inch frames
+output_path = "activation_process_test.mp4"
+replay = None  # (trajectory file, run index): replay a run stored by a sweep's record_trajectories instead of simulating (no edges are stored, so none are drawn)
+
+# Set random seed for reproducibility
+#np.random.seed(42)
+
+# Parameters set from the command line (msbp.cli --set), or from the replayed run; render workers apply them too
+overrides = {}
+
+# matplotlib and networkx are only imported by the functions that draw, so simulate_frames can be used without them
+
+
+# Function to simulate the cascade on CSR adjacency and keep the state array of every frame
+# (frame 0 is the initial state; the last frame is the first state that no longer changes)
+def simulate_frames(A, initial_activated):
+    node_states = initial_states(A.shape[0], initial_activated, sigma)
+    frames = [node_states.copy()]
+    while True:
+        spread_activation_sparse(A, node_states, k1, k2, sigma)
+        if np.array_equal(node_states, frames[-1]):
+            print(f"Total iterations: {len(frames) - 1}")
+            return frames
+        frames.append(node_states.copy())
+
+
+# Function to rasterize the edges into a coverage mask of width x height pixels spanning [-1.1, 1.1]^2.
+# Every undirected edge is sampled at (at most) one-pixel steps, chunk by chunk and in a fixed random order;
+# once a whole chunk covers no new pixel the picture has saturated (a dense graph's disc fills up long before
+# its last edge) and the remaining edges are skipped.
+def rasterize_edges(A, positions, width, height):
+    pixels = (positions + 1.1) / 2.2 * [width - 1, height - 1]
+    rows = np.repeat(np.arange(A.shape[0]), np.diff(A.indptr))
+    upper = np.random.default_rng(0).permutation(np.flatnonzero(rows < A.indices))
+    coverage = np.zeros((height, width), dtype=bool)
+    covered = 0
+    for start in range(0, len(upper), edge_chunk_size):
+        chunk = upper[start:start + edge_chunk_size]
+        a, b = pixels[rows[chunk]], pixels[A.indices[chunk]]
+        counts = np.ceil(np.abs(b - a).max(axis=1)).astype(np.int64) + 1
+        owner = np.repeat(np.arange(len(chunk)), counts)
+        t = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)) / np.maximum(counts - 1, 1)[owner]
+        points = np.rint(a[owner] + (b - a)[owner] * t[:, None]).astype(np.int64)
+        coverage[height - 1 - points[:, 1], points[:, 0]] = True
+        covered, previous = np.count_nonzero(coverage), covered
+        if covered == previous:
+            break
+    return coverage
+
+
+# Function to create the 8x8 inch figure and its axes (also used to size the edge raster)
+def new_figure():
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(8, 8), dpi=dpi)
+    ax.set_axis_off()
+    ax.set_xlim(-1.1, 1.1)
+    ax.set_ylim(-1.1, 1.1)
+    return fig, ax
+
+
+# Function to build the figure once: the title and the edge raster (sized to the axes' pixels, so it is shown
+# without resampling) are drawn into a cached background, then the node scatter and the text overlays are
+# created for the per-frame updates
+def build_figure(coverage, positions):
+    from matplotlib.colors import to_rgba_array
+    fig, ax = new_figure()
+    ax.set_title("Activation Process", fontsize=14)
+    edge_image = np.zeros(coverage.shape + (4,))
+    edge_image[coverage] = to_rgba_array(['gray'])[0]
+    ax.imshow(edge_image, extent=(-1.1, 1.1, -1.1, 1.1), interpolation='nearest', zorder=1)
+    fig.canvas.draw()
+    background = fig.canvas.copy_from_bbox(fig.bbox)
+
+    nodes = ax.scatter(positions[:, 0], positions[:, 1], s=50, zorder=2)
+    step_text = ax.text(0.5, 1.07, "", horizontalalignment='center', verticalalignment='center', transform=ax.transAxes, fontsize=12)
+    # Add another line for parameters slightly lower to avoid overlap
+    parameter_text = ax.text(0.5, 0.97, f"n={n}, k1={k1}, k2={k2}, sigma={sigma}, p={p}",
+                             horizontalalignment='center', verticalalignment='center', transform=ax.transAxes, fontsize=11)
+    return fig, ax, background, nodes, [step_text, parameter_text]
+
+
+# Function to render frames [start, stop) and stream them as raw RGBA images into an ffmpeg process
+def render_frames(coverage, positions, frames, start, stop, path):
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import to_rgba_array
+    fig, ax, background, nodes, texts = build_figure(coverage, positions)
+    palette = to_rgba_array(['lightblue', 'orange', 'red'])  # inactive, weakly and fully activated
+    width, height = fig.canvas.get_width_height()
+    ffmpeg = subprocess.Popen([plt.rcParams['animation.ffmpeg_path'], '-y', '-loglevel', 'error', '-f', 'rawvideo',
+                               '-pix_fmt', 'rgba', '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+                               '-vcodec', 'libx264', '-pix_fmt', 'yuv420p', path], stdin=subprocess.PIPE)
+    for num in range(start, stop):
+        node_states = frames[num]
+        fig.canvas.restore_region(background)
+        nodes.set_facecolor(palette[np.where(node_states == sigma, 2, node_states)])
+        texts[0].set_text(f"Step {num} | Fully Activated: {np.count_nonzero(node_states == sigma)} | "
+                          f"Weakly Activated: {np.count_nonzero(node_states == 1)}")
+        ax.draw_artist(nodes)
+        for text in texts:
+            ax.draw_artist(text)
+        ffmpeg.stdin.write(fig.canvas.buffer_rgba())
+    ffmpeg.stdin.close()
+    if ffmpeg.wait() != 0:
+        raise RuntimeError(f"ffmpeg failed writing {path}")
+    plt.close(fig)
+
+
+# Worker: render one chunk of frames into its own video piece
+def render_chunk(task):
+    render_frames(*task)
+    return task[-1]
+
+
+# Simulate (or replay) one run and render it (python -m msbp video)
+def main():
+    import networkx as nx
+    import matplotlib.pyplot as plt
+    import matplotlib.animation as animation
+
+    if renderer == 'incremental':
+        if replay is not None:
+            trajectories, params = load_trajectories(replay[0])
+            trajectory = trajectories[replay[1]]
+            apply_overrides(__name__, {name: params[name] for name in ('n', 'k1', 'k2', 'sigma', 'p')})
+            frames = [states_at(trajectory, step, sigma) for step in range(len(trajectory_steps(trajectory)))]
+        else:
+            A = erdos_renyi_csr(n, p)
+            initial_activated = np.random.choice(n, initial_activated_count, replace=False)
+            frames = simulate_frames(A, initial_activated)
+
+        # The edges are rasterized once; the frames only need the raster, not the graph
+        positions = np.asarray(list(nx.circular_layout(range(n)).values()))
+        fig, ax = new_figure()
+        width, height = int(round(ax.bbox.width)), int(round(ax.bbox.height))
+        coverage = rasterize_edges(A, positions, width, height) if replay is None else np.zeros((height, width), dtype=bool)
+        plt.close(fig)
+
+        if render_processes <= 1:
+            render_frames(coverage, positions, frames, 0, len(frames), output_path)
+        else:
+            # Contiguous chunks of frames become separate pieces, joined without re-encoding by ffmpeg's concat demuxer
+            bounds = np.linspace(0, len(frames), min(render_processes, len(frames)) + 1).astype(int)
+            tasks = [(coverage, positions, frames, start, stop, f"{output_path}.part{index}.mp4")
+                     for index, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:]))]
+            with multiprocessing.Pool(processes=render_processes, initializer=apply_overrides, initargs=(__name__, overrides)) as pool:
+                pieces = pool.map(render_chunk, tasks)
+            with open(f"{output_path}.parts.txt", 'w') as file:
+                file.writelines(f"file '{os.path.abspath(piece)}'\n" for piece in pieces)
+            subprocess.run([plt.rcParams['animation.ffmpeg_path'], '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+                            '-i', f"{output_path}.parts.txt", '-c', 'copy', output_path], check=True)
+            for piece in pieces + [f"{output_path}.parts.txt"]:
+                os.remove(piece)
+
+    else:
+        # Generate random network
+        G = nx.erdos_renyi_graph(n, p)
+
+        # Initialize node states: 0 (inactive), 1 (partially activated), sigma (fully activated)
+        initial_activated = np.random.choice(G.nodes, initial_activated_count, replace=False)
+        node_states = {node: sigma if node in initial_activated else 0 for node in G.nodes}
+
+        # Create animation
+        fig, ax = plt.subplots(figsize=(8, 8))
+        pos = nx.circular_layout(G)  # Circular layout for nodes
+
+        # Store previous node states for comparison
+        previous_node_states = node_states.copy()
+
+        # Initialize iteration count
+        iteration_count = 0
+
+        # Generator function to yield frames for the animation
+        def frame_gen():
+            nonlocal previous_node_states, iteration_count
+            num = 0
+            # Yield initial state (Step 0)
+            yield num  # This will draw the initial state
+
+            while True:
+                new_fully_activated, new_weakly_activated, _ = spread_activation(G, node_states, k1, k2, sigma)
+
+                # Check if the activation spread has stopped
+                if node_states == previous_node_states:
+                    print(f"Total iterations: {iteration_count}")  # Print the total iterations when it stops
+                    break  # Stop the generator when there are no more updates
+                else:
+                    previous_node_states = node_states.copy()  # Update previous state for the next step
+                    iteration_count += 1  # Increment iteration count
+
+                num += 1
+                yield num  # Yield the current frame number
+
+        # Update function for each frame in the animation
+        def update(num):
+            # Clear the current plot
+            ax.clear()
+            colors = ['red' if node_states[node] == sigma else 'orange' if node_states[node] == 1 else 'lightblue' for node in
+                      G.nodes]
+            nx.draw(G, pos, node_color=colors, with_labels=False, node_size=50, edge_color='gray', ax=ax)
+
+            # Calculate the number of fully activated and weakly activated nodes
+            fully_activated_count = sum(1 for state in node_states.values() if state == sigma)
+            weakly_activated_count = sum(1 for state in node_states.values() if state == 1)
+
+            # Add parameter information at the top of the plot
+            ax.text(0.5, 1.07, f"Step {num} | Fully Activated: {fully_activated_count} | Weakly Activated: {weakly_activated_count}",
+                    horizontalalignment='center', verticalalignment='center', transform=ax.transAxes, fontsize=12)
+
+            # Add another line for parameters slightly lower to avoid overlap
+            ax.text(0.5, 0.97, f"n={n}, k1={k1}, k2={k2}, sigma={sigma}, p={p}",
+                    horizontalalignment='center', verticalalignment='center', transform=ax.transAxes, fontsize=11)
+
+            ax.set_title("Activation Process", fontsize=14)
+
+        # Create animation using dynamic frames from the frame generator
+        ani = animation.FuncAnimation(fig, update, frames=frame_gen, interval=2000, repeat=False)
+
+        # Save animation as video file
+        ani.save(output_path, writer='ffmpeg', fps=fps)
+
+        plt.show()
+
+
+if __name__ == '__main__':
+    main()
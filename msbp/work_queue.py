@@ -0,0 +1,122 @@
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+from msbp.result_store import open_store, chunk_seed, load_chunk, save_chunk
+from msbp.profiling import profile_call
+
+
+# Function to open (or create) a work queue: a sqlite file on a directory every machine can reach, holding one
+# lease per posted chunk next to the result store's chunk table (finished chunks are stored there by the workers,
+# their profiles in the lease)
+def open_queue(path):
+    connection = open_store(path, timeout=60)
+    connection.execute('CREATE TABLE IF NOT EXISTS leases (cell TEXT, chunk INTEGER, count INTEGER, worker TEXT, '
+                       'expires REAL, done INTEGER, error TEXT, profile TEXT, PRIMARY KEY (cell, chunk))')
+    connection.commit()
+    return connection
+
+
+# Function to post one chunk of a cell for the workers (replacing any lease left over from an earlier sweep)
+def post_lease(connection, key, chunk_index, count):
+    connection.execute('INSERT OR REPLACE INTO leases VALUES (?, ?, ?, NULL, 0, 0, NULL, NULL)', (key, chunk_index, count))
+    connection.commit()
+
+
+# Function to claim the oldest unfinished chunk that nobody holds or whose lease has expired (its worker died);
+# one UPDATE, so two workers never get the same live lease. Returns (cell key, chunk index, count) or None.
+def claim_lease(connection, worker, lease_seconds):
+    now = time.time()
+    row = connection.execute('UPDATE leases SET worker = ?, expires = ? WHERE rowid = (SELECT rowid FROM leases '
+                             'WHERE done = 0 AND error IS NULL AND expires < ? ORDER BY rowid LIMIT 1) '
+                             'RETURNING cell, chunk, count', (worker, now + lease_seconds, now)).fetchone()
+    connection.commit()
+    return row
+
+
+# Function to extend a lease while its chunk is still running
+def renew_lease(connection, worker, key, chunk_index, lease_seconds):
+    connection.execute('UPDATE leases SET expires = ? WHERE cell = ? AND chunk = ? AND worker = ?',
+                       (time.time() + lease_seconds, key, chunk_index, worker))
+    connection.commit()
+
+
+# Function to store a finished chunk and mark its lease done (with the chunk's profiling.profile_call profile).
+# A chunk whose lease expired may finish twice; both copies come from the same chunk seed, so the second simply
+# replaces the first.
+def complete_lease(connection, key, chunk_index, results, profile=None):
+    save_chunk(connection, key, chunk_index, results)
+    connection.execute('UPDATE leases SET done = 1, profile = ? WHERE cell = ? AND chunk = ?',
+                       (json.dumps(profile) if profile is not None else None, key, chunk_index))
+    connection.commit()
+
+
+# Function to record that a chunk failed on a worker; the coordinator raises it instead of reassigning the lease
+def fail_lease(connection, key, chunk_index, error):
+    connection.execute('UPDATE leases SET error = ? WHERE cell = ? AND chunk = ?', (error, key, chunk_index))
+    connection.commit()
+
+
+# Function for the coordinator to collect the finished chunks among `posted` ({(cell key, chunk index): ...}):
+# returns [(cell key, chunk index, results, profile)] and removes their leases
+def collect_leases(connection, posted):
+    finished = []
+    for key, chunk_index, done, error, profile in connection.execute('SELECT cell, chunk, done, error, profile FROM leases '
+                                                                     'WHERE done = 1 OR error IS NOT NULL').fetchall():
+        if (key, chunk_index) not in posted:
+            continue
+        if error is not None:
+            raise RuntimeError(f'Chunk {chunk_index} of cell {key} failed on a worker:\n{error}')
+        finished.append((key, chunk_index, load_chunk(connection, key, chunk_index), json.loads(profile) if profile is not None else None))
+        connection.execute('DELETE FROM leases WHERE cell = ? AND chunk = ?', (key, chunk_index))
+    connection.commit()
+    return finished
+
+
+# Heartbeat thread of a worker: renews its lease every third of the lease time until `stop` is set
+def keep_lease(path, worker, key, chunk_index, lease_seconds, stop):
+    connection = open_queue(path)
+    while not stop.wait(lease_seconds / 3):
+        renew_lease(connection, worker, key, chunk_index, lease_seconds)
+    connection.close()
+
+
+# Worker loop: claims leases from the queue at `path`, runs each chunk as run_sweep would
+# (run_chunk(*cell, count, seed) with the chunk seed derived from the sweep seed) and stores the results.
+# cells_by_key maps the worker's own cell keys to cells; a lease for an unknown key means the worker's parameters
+# differ from the coordinator's and fails the chunk. The worker exits after idle_seconds without work.
+# Every chunk is profiled (profiling.profile_call) so a profiling coordinator gets the same records as a local pool;
+# its started/finished times come from the worker's clock.
+def run_worker(path, cells_by_key, run_chunk, seed=None, lease_seconds=60, idle_seconds=30, poll_seconds=0.5):
+    worker = f'{socket.gethostname()}-{os.getpid()}'
+    connection = open_queue(path)
+    idle_since = time.time()
+    while True:
+        lease = claim_lease(connection, worker, lease_seconds)
+        if lease is None:
+            if time.time() - idle_since > idle_seconds:
+                break
+            time.sleep(poll_seconds)
+            continue
+
+        key, chunk_index, count = lease
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=keep_lease, args=(path, worker, key, chunk_index, lease_seconds, stop), daemon=True)
+        heartbeat.start()
+        try:
+            if key not in cells_by_key:
+                raise KeyError(f'Cell {key} is not part of this worker\'s sweep (are its parameters the same as the coordinator\'s?)')
+            started = time.time()
+            results, profile = profile_call(run_chunk, *cells_by_key[key], count, chunk_seed(seed, key, chunk_index) if seed is not None else None)
+            profile.update(started=started, finished=time.time())
+        except Exception:
+            fail_lease(connection, key, chunk_index, traceback.format_exc())
+        else:
+            complete_lease(connection, key, chunk_index, results, profile)
+        finally:
+            stop.set()
+            heartbeat.join()
+        idle_since = time.time()
+    connection.close()
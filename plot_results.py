@@ -0,0 +1,135 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from msbp.result_table import load_results
+
+# Parameters
+results_path = 'parallel2.parquet'  # Result set every figure is drawn from (a .parquet dataset or a .csv file)
+output_dir = 'figures'  # Directory the images are written to
+views = None  # Names of the figure_views to render (None for all)
+image_format = 'png'
+processes = 7  # Figures rendered in parallel
+
+# Every plot_y view: the column on the y axis plus the per-view details of the original scripts.
+# k1_values restricts the curves (None for every k1 in the data); annotate writes another column's value under each point.
+figure_views = {
+    'average fully activated nodes': {'column': 'Average Fully Activated Nodes', 'title': 'Average Fully Activated Nodes',
+                                      'experiments_label': 'Total Experiments'},
+    'fully activated proportion': {'column': 'Full Activation Proportion', 'title': 'Full Activation Proportion'},
+    'iterations': {'column': 'Average Iterations for Full Activation', 'title': 'Average Iterations for Full Activation'},
+    'Average Weak Activation Proportion': {'column': 'Penultimate Weak Activation Proportion',
+                                           'title': 'Average Penultimate Weak Activation Proportion',
+                                           'ylabel': 'Average Second Last Weak Activation Proportion'},
+    'Average Direct Full Activation Proportion top bottom': {'column': 'Average Direct Full Activation Proportion',
+                                                             'title': 'Average Direct Full Activation Proportion',
+                                                             'k1_values': [13, 14, 15], 'font_size': 12, 'title_size': 16,
+                                                             'label_size': 14, 'tick_size': 12, 'legend_sizes': (12, 10)},
+    'First_Step_Weak_Activation_Count': {'column': 'First Step Weak Activation Count', 'title': 'First Step Weak Activation Count',
+                                         'font_size': 10, 'title_size': 16, 'label_size': 14, 'tick_size': 12,
+                                         'legend_sizes': (12, 10)},
+    'Final Step Full Activation Proportion': {'column': 'Final Step Full Activation Proportion',
+                                              'title': 'Average Final Step Full Activation Proportion',
+                                              'k1_values': [10, 19, 'None'], 'figsize': (12, 8),
+                                              'annotate': 'Average Iterations for Full Activation'},
+}
+
+
+# Function to list the result columns a view needs
+def view_columns(name):
+    view = figure_views[name]
+    return ['k1', 'k2', 'n', 'p', 'Total Experiments', view['column']] + ([view['annotate']] if 'annotate' in view else [])
+
+
+# Function to cut the rows and columns of one view out of a loaded result set (k1 None becomes the string "None")
+def view_data(name, data):
+    data = data[view_columns(name)].copy()
+    data['k1'] = data['k1'].astype(object).where(data['k1'].notna(), 'None')
+    k1_values = figure_views[name].get('k1_values')
+    if k1_values is not None:
+        data = data[data['k1'].isin(k1_values)]
+    return data.reset_index(drop=True)
+
+
+# Function to draw one view as a new figure: y column vs. p, one curve per k1
+def render_view(name, data):
+    view = figure_views[name]
+    label_size = view.get('label_size')
+    with plt.rc_context({'font.size': view.get('font_size', plt.rcParams['font.size'])}):
+        figure = plt.figure(figsize=view.get('figsize', (10, 6)))  # Set the figure width and height
+        cmap = plt.get_cmap('tab20')  # Get a larger color palette
+
+        # Extract k2 and n from the data (constant across the rows of a sweep) and the experiments per simulated cell:
+        # the largest count, since prescreened cells record 0 (or prescreen_experiments) and adaptive cells vary
+        k2_value = data['k2'].unique()[0]
+        experiments = data['Total Experiments'].max()
+        n = data['n'].unique()[0]
+
+        for i, k1 in enumerate(data['k1'].unique()):
+            subset = data[data['k1'] == k1]
+            plt.plot(subset['p'], subset[view['column']], marker='o', color=cmap(i % cmap.N), label=f'k1 = {k1}')
+            if 'annotate' in view:
+                for x, y, value in zip(subset['p'], subset[view['column']], subset[view['annotate']]):
+                    plt.text(x, y - 0.02, f'{value:.2f}', ha='center', va='top', fontsize=10, color='black')
+
+        plt.title(f"{view['title']} vs. Probability (p)\nk2 = {k2_value}, {view.get('experiments_label', 'Experiments')} = {experiments}, Nodes = {n}",
+                  fontsize=view.get('title_size'))
+        plt.xlabel('Probability (p)', fontsize=label_size)
+        plt.ylabel(view.get('ylabel', view['title']), fontsize=label_size)
+        plt.xticks(np.arange(0, 1.05, 0.05), fontsize=view.get('tick_size'))  # Set the x-axis ticks within the range
+        plt.yticks(fontsize=view.get('tick_size'))
+
+        title_size, legend_size = view.get('legend_sizes', (None, None))
+        plt.legend(title='k1 values', bbox_to_anchor=(1.05, 1), loc='upper left', title_fontsize=title_size, fontsize=legend_size)
+        plt.grid()
+        plt.tight_layout()
+    return figure
+
+
+# Function to fingerprint the input of a view: its data and its settings
+def view_fingerprint(name, data):
+    digest = hashlib.sha256(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+    digest.update(repr(sorted(figure_views[name].items())).encode())
+    return digest.hexdigest()
+
+
+# Worker: render one view headless and write it to `path`
+def render_to_file(task):
+    name, data, path = task
+    plt.switch_backend('Agg')
+    figure = render_view(name, data)
+    figure.savefig(path)
+    plt.close(figure)
+    return name
+
+
+# Batch entry point: load the result set once, then render every requested view in a process pool.
+# Views whose data and settings are unchanged since their last render (recorded in fingerprints.json) are skipped.
+if __name__ == '__main__':
+    names = list(figure_views) if views is None else views
+    data = load_results(results_path, columns=list(dict.fromkeys(column for name in names for column in view_columns(name))))
+
+    os.makedirs(output_dir, exist_ok=True)
+    fingerprint_path = os.path.join(output_dir, 'fingerprints.json')
+    fingerprints = json.load(open(fingerprint_path)) if os.path.exists(fingerprint_path) else {}
+
+    tasks = []
+    for name in names:
+        subset = view_data(name, data)
+        path = os.path.join(output_dir, f'{name}.{image_format}')
+        fingerprint = view_fingerprint(name, subset)
+        if fingerprints.get(path) == fingerprint and os.path.exists(path):
+            print(f"Skipping {name}: unchanged since {path}")
+            continue
+        fingerprints[path] = fingerprint
+        tasks.append((name, subset, path))
+
+    with multiprocessing.Pool(processes=processes) as pool:
+        for name in pool.imap_unordered(render_to_file, tasks):
+            print(f"Rendered {name}")
+
+    with open(fingerprint_path, 'w') as file:
+        json.dump(fingerprints, file, indent=1)